@@ -1,19 +1,35 @@
 import os
-from fastapi import FastAPI, HTTPException, Depends, Header, Query
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from anyio import to_thread
 from datetime import date, datetime, timedelta, timezone
-from sqlalchemy import create_engine, Column, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, String, Integer, TypeDecorator, Date, DateTime, ForeignKey, Boolean, Index, UniqueConstraint, select, insert, delete, text, bindparam, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy.orm import sessionmaker, relationship, Session, load_only, selectinload
 from uuid import uuid4
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import csv
+import io
+import difflib
+import bisect
 import hashlib
+import hmac
+import ipaddress
+import json
 import secrets
-import random
 from dotenv import load_dotenv
 import re
+import threading
 import time
+import zlib
 
 
 # ✅ 加载环境变量
@@ -24,11 +40,82 @@ DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
+# Token 缓存：最多缓存多少个 token，单条最长缓存秒数（0 表示关闭缓存）
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+# Token 模式：table = 随机 token 存数据库（默认）；signed = 自包含的 HMAC 签名 token
+TOKEN_MODE = os.getenv("TOKEN_MODE", "table").lower()
+# 签名密钥列表，格式 "kid1:secret1,kid2:secret2"，第一个用于签发，全部可用于校验（密钥轮换）
+TOKEN_SIGNING_KEYS = os.getenv("TOKEN_SIGNING_KEYS", "")
+# 过期 token 清理：间隔秒数（0 表示不启动清理任务），每批删除的最大行数
+TOKEN_PURGE_INTERVAL = int(os.getenv("TOKEN_PURGE_INTERVAL", "600"))
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "500"))
+# 同步接口运行在线程池中：线程数与数据库连接池大小应保持匹配
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+# 密码哈希：算法（scrypt / sha256），scrypt 成本参数，哈希线程数和最大排队数
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "scrypt").lower()
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", "16384"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "16"))
+# 无效 token 负缓存：最多记录多少个、记录多少秒
+INVALID_TOKEN_CACHE_SIZE = int(os.getenv("INVALID_TOKEN_CACHE_SIZE", "4096"))
+INVALID_TOKEN_CACHE_TTL = int(os.getenv("INVALID_TOKEN_CACHE_TTL", "60"))
+# 按 IP 限流（令牌桶）：登录接口，以及需要查库的 token 校验
+LOGIN_RATE_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_MINUTE", "20"))
+LOGIN_BURST = int(os.getenv("LOGIN_BURST", "10"))
+AUTH_LOOKUP_RATE_PER_MINUTE = float(os.getenv("AUTH_LOOKUP_RATE_PER_MINUTE", "300"))
+AUTH_LOOKUP_BURST = int(os.getenv("AUTH_LOOKUP_BURST", "60"))
+# 受信任的反向代理地址（逗号分隔，支持 CIDR，* 表示全部信任）：来自这些地址的请求按 X-Forwarded-For 取客户端 IP
+TRUSTED_PROXY_IPS = os.getenv("TRUSTED_PROXY_IPS", "")
+# 流式输出时每批从数据库读取的行数
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+# 问题目录内存快照（/api/all_questions、/api/question/{id}、/api/daily-questions 不再查库）
+QUESTION_CATALOG_CACHE = os.getenv("QUESTION_CATALOG_CACHE", "true").lower() == "true"
+# 每日问题排期：提前生成多少天（0 表示不启动后台任务），后台任务间隔，内存结果多久重新读取一次排期表
+DAILY_SCHEDULE_DAYS_AHEAD = int(os.getenv("DAILY_SCHEDULE_DAYS_AHEAD", "14"))
+DAILY_SCHEDULE_INTERVAL = int(os.getenv("DAILY_SCHEDULE_INTERVAL", "3600"))
+DAILY_SCHEDULE_REFRESH = int(os.getenv("DAILY_SCHEDULE_REFRESH", "300"))
+# 全文索引补建时每批处理的行数
+SEARCH_INDEX_BATCH_SIZE = int(os.getenv("SEARCH_INDEX_BATCH_SIZE", "1000"))
+# 草稿写缓冲：每隔多少秒批量落库；缓冲的草稿数达到上限时立即落库
+DRAFT_FLUSH_INTERVAL = float(os.getenv("DRAFT_FLUSH_INTERVAL", "3"))
+DRAFT_MAX_PENDING = int(os.getenv("DRAFT_MAX_PENDING", "10000"))
+# 答案修订历史：每隔多少个版本存一次完整快照（还原任意版本最多应用 N-1 个增量）
+ANSWER_REVISION_KEYFRAME_INTERVAL = max(1, int(os.getenv("ANSWER_REVISION_KEYFRAME_INTERVAL", "10")))
+# 答案正文压缩存储（可选）：空（不压缩）| zlib | zstd（需安装 zstandard），超过阈值字节数才压缩
+ANSWER_COMPRESSION = os.getenv("ANSWER_COMPRESSION", "").lower()
+ANSWER_COMPRESSION_MIN_BYTES = int(os.getenv("ANSWER_COMPRESSION_MIN_BYTES", "1024"))
+# /api/user/settings 是否默认附带全部答案（旧版前端兼容，新前端改用 /api/user/answers 分页）
+USER_SETTINGS_INCLUDE_ANSWERS = os.getenv("USER_SETTINGS_INCLUDE_ANSWERS", "false").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时创建后台任务，关闭时取消"""
+    # 所有访问数据库的接口都是同步 def，由 FastAPI 放到线程池执行，不阻塞事件循环
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    background_tasks = []
+    if TOKEN_PURGE_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(token_purge_loop()))
+    if DAILY_SCHEDULE_DAYS_AHEAD > 0:
+        background_tasks.append(asyncio.create_task(daily_schedule_loop()))
+    background_tasks.append(asyncio.create_task(asyncio.to_thread(backfill_search_indexes)))
+    background_tasks.append(asyncio.create_task(draft_flush_loop()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    # 关闭前把缓冲中的草稿写入数据库
+    await asyncio.to_thread(draft_buffer.flush)
+
 
 # ✅ FastAPI 实例
 app = FastAPI(
     title="Your App API",
     debug=DEBUG,
+    lifespan=lifespan,
 )
 
 # ✅ 动态 CORS 配置
@@ -58,6 +145,8 @@ if "sqlite" in DATABASE_URL:
 engine = create_engine(
     DATABASE_URL,
     connect_args=connect_args,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
     echo=DEBUG
 )
 
@@ -81,12 +170,77 @@ def get_db():
         db.close()
 
 
+# ✅ 长文本压缩存储
+COMPRESSION_CODECS: Dict[str, Tuple[bytes, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (b"z", lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+try:
+    import zstandard
+    COMPRESSION_CODECS["zstd"] = (
+        b"s",
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+except ImportError:
+    pass
+if ANSWER_COMPRESSION and ANSWER_COMPRESSION not in COMPRESSION_CODECS:
+    raise RuntimeError(f"Unsupported ANSWER_COMPRESSION: {ANSWER_COMPRESSION}")
+
+# 非 SQLite 数据库中压缩数据以文本保存：前缀 + base64
+COMPRESSED_TEXT_PREFIX = "\x01"
+
+
+class CompressedString(TypeDecorator):
+    """
+    透明压缩的字符串列：写入时超过 ANSWER_COMPRESSION_MIN_BYTES 且确实变小才压缩，读取时自动解压。
+    压缩数据 = 1 字节算法标记 + 压缩内容；SQLite 直接存为 BLOB（列类型不变，无需改表），
+    其他数据库存为 COMPRESSED_TEXT_PREFIX + base64 文本。
+    未开启压缩时仍能读取已压缩的行。注意 SQL 端的 LIKE 等字符串函数看不到压缩行的原文。
+    """
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        # 明文恰好以前缀开头时必须压缩，否则读取时会被误认为压缩数据
+        ambiguous = dialect.name != "sqlite" and value.startswith(COMPRESSED_TEXT_PREFIX)
+        codec = COMPRESSION_CODECS.get(ANSWER_COMPRESSION or ("zlib" if ambiguous else ""))
+        if codec is None:
+            return value
+        raw = value.encode()
+        if not ambiguous and len(raw) < ANSWER_COMPRESSION_MIN_BYTES:
+            return value
+        payload = codec[0] + codec[1](raw)
+        if dialect.name == "sqlite":
+            stored, stored_size = payload, len(payload)
+        else:
+            stored = COMPRESSED_TEXT_PREFIX + base64.b64encode(payload).decode("ascii")
+            # 前缀和 base64 都是 ASCII，字符数即字节数
+            stored_size = len(stored)
+        # 按最终存储的大小比较：base64 约增大 1/3，压缩率不到 25% 的行在非 SQLite 数据库中存明文更小
+        if not ambiguous and stored_size >= len(raw):
+            return value
+        return stored
+
+    def process_result_value(self, value, dialect):
+        # SQLite 的压缩数据是 BLOB，以前缀开头的文本就是明文
+        if dialect.name != "sqlite" and isinstance(value, str) and value.startswith(COMPRESSED_TEXT_PREFIX):
+            value = base64.b64decode(value[len(COMPRESSED_TEXT_PREFIX):])
+        if isinstance(value, bytes):
+            for marker, _, decompress in COMPRESSION_CODECS.values():
+                if value[:1] == marker:
+                    return decompress(value[1:]).decode()
+            raise ValueError(f"Unknown compression marker: {value[:1]!r}")
+        return value
+
+
 # Database Models
 class Token(Base):
     __tablename__ = "tokens"
     token = Column(String, primary_key=True, index=True)
     email = Column(String)
-    expires_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), index=True)
 
 
 class Question(Base):
@@ -100,17 +254,30 @@ class Question(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     answers = relationship("Answer", back_populates="question")
 
+    __table_args__ = (
+        # /api/questions?tag=...(&is_public=...) 按 id 分页：id 放在索引最后，按索引顺序读取不用再排序
+        Index("ix_questions_tag_id", "tag", "id"),
+        Index("ix_questions_tag_is_public_id", "tag", "is_public", "id"),
+    )
+
 
 class Answer(Base):
     __tablename__ = "answers"
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid4()))
     user_email = Column(String, ForeignKey("users.email"))
-    content = Column(String)
+    content = Column(CompressedString)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     question_id = Column(String, ForeignKey("questions.id"))
     question = relationship("Question", back_populates="answers")
     user = relationship("User", back_populates="answers")
 
+    __table_args__ = (
+        # 按时间范围读取某用户的答案（活跃度日历、按日期查看）
+        Index("ix_answers_user_email_created_at", "user_email", "created_at"),
+        # 某用户对某问题的答案，按时间排序
+        Index("ix_answers_user_email_question_id_created_at", "user_email", "question_id", "created_at"),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -128,7 +295,7 @@ class Folder(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid4()), index=True)
     name = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     user = relationship("User", back_populates="folders")
     questions = relationship("FolderQuestion", back_populates="folder")
 
@@ -136,12 +303,66 @@ class Folder(Base):
 class FolderQuestion(Base):
     __tablename__ = "folder_questions"
     id = Column(String, primary_key=True, default=lambda: str(uuid4()), index=True)
-    folder_id = Column(String, ForeignKey("folders.id"), nullable=False)
+    folder_id = Column(String, ForeignKey("folders.id"), nullable=False, index=True)
     question_id = Column(String, ForeignKey("questions.id"), nullable=False)
     folder = relationship("Folder", back_populates="questions")
     question = relationship("Question")
 
 
+class DailySchedule(Base):
+    __tablename__ = "daily_schedule"
+    day = Column(Date, primary_key=True)
+    question_ids = Column(String, nullable=False)  # 逗号分隔，保持顺序
+    pinned = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class AnswerRevision(Base):
+    __tablename__ = "answer_revisions"
+    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    answer_id = Column(String, ForeignKey("answers.id"), nullable=False)
+    revision = Column(Integer, nullable=False)  # 从 1 开始，1 为原始内容
+    base_revision = Column(Integer, nullable=False)  # 所基于的完整快照版本号
+    is_keyframe = Column(Boolean, nullable=False, default=False)
+    data = Column(String, nullable=False)  # 完整快照为原文，增量为 JSON（见 make_revision_delta）
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("answer_id", "revision", name="uq_answer_revisions_answer_revision"),
+    )
+
+
+class Draft(Base):
+    __tablename__ = "drafts"
+    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    user_email = Column(String, ForeignKey("users.email"), nullable=False)
+    question_id = Column(String, ForeignKey("questions.id"), nullable=False)
+    content = Column(String, nullable=False, default="")
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("user_email", "question_id", name="uq_drafts_user_question"),
+    )
+
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+    user_email = Column(String, ForeignKey("users.email"), primary_key=True)
+    answer_count = Column(Integer, nullable=False, default=0)
+    char_count = Column(Integer, nullable=False, default=0)
+    word_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class UserTagStats(Base):
+    __tablename__ = "user_tag_stats"
+    user_email = Column(String, ForeignKey("users.email"), primary_key=True)
+    tag = Column(String, primary_key=True)  # 问题没有标签时为空字符串
+    answer_count = Column(Integer, nullable=False, default=0)
+    char_count = Column(Integer, nullable=False, default=0)
+    word_count = Column(Integer, nullable=False, default=0)
+
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
@@ -222,15 +443,167 @@ def validate_user_settings_update(data: Dict[str, Any]) -> Dict[str, Optional[st
     return result
 
 
+def validate_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Optional[List[str]]:
+    """解析 fields=a,b,c 查询参数；不传时返回 None（输出全部字段），id 总是包含在内"""
+    if fields is None:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    return [name for name in allowed if name == "id" or name in requested]
+
+
 # Utility functions
+class LegacySHA256Hasher:
+    """旧格式：无盐 SHA-256 十六进制摘要，仅用于校验历史密码"""
+    name = "sha256"
+
+    def identify(self, hashed_password: str) -> bool:
+        return len(hashed_password) == 64 and "$" not in hashed_password
+
+    def hash(self, password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return hmac.compare_digest(self.hash(password), hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return False
+
+
+class ScryptHasher:
+    """加盐 scrypt（内存密集型 KDF），格式：scrypt$n$r$p$salt$hash"""
+    name = "scrypt"
+
+    def __init__(self, n: int = 16384, r: int = 8, p: int = 1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith("scrypt$")
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=256 * n * r, dklen=32,
+        )
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f"scrypt${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            _, n, r, p, salt, digest = hashed_password.split("$")
+            expected = _b64decode(digest)
+            actual = self._derive(password, _b64decode(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(expected, actual)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return not hashed_password.startswith(f"scrypt${self.n}${self.r}${self.p}$")
+
+
+PASSWORD_HASHERS = {
+    "scrypt": ScryptHasher(n=PASSWORD_SCRYPT_N),
+    "sha256": LegacySHA256Hasher(),
+}
+if PASSWORD_HASHER not in PASSWORD_HASHERS:
+    raise RuntimeError(f"Unknown PASSWORD_HASHER: {PASSWORD_HASHER}")
+
+
+def identify_hasher(hashed_password: str):
+    """根据存储格式找到对应的哈希算法"""
+    for hasher in PASSWORD_HASHERS.values():
+        if hasher.identify(hashed_password):
+            return hasher
+    return None
+
+
 def hash_password(password: str) -> str:
-    """Hash a password using SHA-256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """用当前配置的算法哈希密码"""
+    return PASSWORD_HASHERS[PASSWORD_HASHER].hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return hash_password(plain_password) == hashed_password
+    """校验密码（兼容旧的 SHA-256 格式）"""
+    hasher = identify_hasher(hashed_password)
+    return hasher is not None and hasher.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """存储格式不是当前算法/参数时需要重新哈希"""
+    current = PASSWORD_HASHERS[PASSWORD_HASHER]
+    return not current.identify(hashed_password) or current.needs_rehash(hashed_password)
+
+
+class PasswordHashPool:
+    """有界的密码哈希线程池：排队超过上限时直接返回 503，避免登录高峰拖垮其他接口"""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+        self.max_total_ms = 0.0
+
+    def run(self, fn: Callable, *args):
+        """在哈希线程池中执行 fn，等待结果"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+        submitted = time.perf_counter()
+        timings = {}
+
+        def timed():
+            timings["started"] = time.perf_counter()
+            return fn(*args)
+
+        with self._lock:
+            self.pending += 1
+        try:
+            return self._executor.submit(timed).result()
+        finally:
+            finished = time.perf_counter()
+            self._slots.release()
+            started = timings.get("started", finished)
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_wait_ms += (started - submitted) * 1000
+                self.total_run_ms += (finished - started) * 1000
+                self.max_total_ms = max(self.max_total_ms, (finished - submitted) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "algorithm": PASSWORD_HASHER,
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_ms / completed, 2),
+                "avg_run_ms": round(self.total_run_ms / completed, 2),
+                "max_total_ms": round(self.max_total_ms, 2),
+            }
+
+
+# ✅ 所有哈希计算都走这个线程池（hashlib.scrypt 计算时会释放 GIL）
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
 
 
 def generate_token() -> str:
@@ -238,28 +611,375 @@ def generate_token() -> str:
     return secrets.token_hex(16)
 
 
-def get_current_user(authorization: str = Header(...)):
-    """获取当前用户"""
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token header")
-    token = authorization.split(" ")[1]
+class LRUTTLCache:
+    """线程安全的 LRU 缓存，每个条目有自己的过期时间"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """命中返回缓存值，未命中或已过期返回 None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            deadline, value = item
+            if deadline <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存，ttl 不会超过缓存本身的 TTL"""
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """删除所有满足条件的条目，返回删除数量"""
+        with self._lock:
+            keys = [k for k, (_, v) in self._data.items() if predicate(v)]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
 
-    db = SessionLocal()
-    db_token = db.query(Token).filter(Token.token == token).first()
-    # print(db_token.expires_at, datetime.now(timezone.utc))
-    # if not db_token or db_token.expires_at < datetime.now(timezone.utc):
-    # if not db_token or db_token.expires_at < datetime.utcnow():
-    if not db_token or safe_compare(db_token.expires_at, datetime.now(timezone.utc)):
-        db.close()
+
+# ✅ token -> User 缓存，避免每个请求都查 tokens / users 两张表
+token_cache = LRUTTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+# ✅ 最近被拒绝的 token（按 SHA-256 摘要记录），重复请求直接在内存中拒绝
+invalid_token_cache = LRUTTLCache(maxsize=INVALID_TOKEN_CACHE_SIZE, ttl=INVALID_TOKEN_CACHE_TTL)
+
+
+class TokenBucketLimiter:
+    """按 key（客户端 IP）限流的令牌桶，最多跟踪 max_keys 个 key"""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def allow(self, key: str) -> bool:
+        """消耗一个令牌，令牌不足返回 False"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+                self.allowed += 1
+            else:
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def check(self, key: str):
+        """令牌不足时抛出 429"""
+        if not self.allow(key):
+            retry_after = max(1, int(1 / self.rate)) if self.rate > 0 else 60
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "tracked_keys": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+            }
+
+
+login_rate_limiter = TokenBucketLimiter(LOGIN_RATE_PER_MINUTE, LOGIN_BURST)
+auth_lookup_rate_limiter = TokenBucketLimiter(AUTH_LOOKUP_RATE_PER_MINUTE, AUTH_LOOKUP_BURST)
+
+
+def parse_trusted_proxies(raw: str) -> Optional[List[Any]]:
+    """解析 TRUSTED_PROXY_IPS，返回网段列表；* 返回 None 表示信任所有地址"""
+    entries = [entry.strip() for entry in raw.split(",") if entry.strip()]
+    if "*" in entries:
+        return None
+    return [ipaddress.ip_network(entry, strict=False) for entry in entries]
+
+
+trusted_proxies = parse_trusted_proxies(TRUSTED_PROXY_IPS)
+
+
+def is_trusted_proxy(host: str) -> bool:
+    if trusted_proxies is None:
+        return True
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_proxies)
+
+
+def client_ip(request: Request) -> str:
+    """
+    客户端 IP，用作限流的 key
+    部署在反向代理后面时 request.client 是代理的地址，所有用户会共用一个令牌桶：
+    需要把代理地址配置到 TRUSTED_PROXY_IPS，从 X-Forwarded-For 右侧跳过受信任的代理，
+    第一个不受信任的地址即客户端（全部受信任时取最左侧）。
+    uvicorn 的 --proxy-headers 默认只信任 127.0.0.1，对平台负载均衡器不生效。
+    """
+    host = request.client.host if request.client else "unknown"
+    if not TRUSTED_PROXY_IPS or not is_trusted_proxy(host):
+        return host
+    forwarded = [
+        hop.strip() for value in request.headers.getlist("x-forwarded-for")
+        for hop in value.split(",") if hop.strip()
+    ]
+    for hop in reversed(forwarded):
+        if not is_trusted_proxy(hop):
+            return hop
+    return forwarded[0] if forwarded else host
+
+
+# ✅ 签名 token：st.<base64(user_id.过期时间戳.kid)>.<base64(HMAC-SHA256)>
+SIGNED_TOKEN_PREFIX = "st."
+
+
+def parse_signing_keys(raw: str) -> "OrderedDict[str, bytes]":
+    """解析 TOKEN_SIGNING_KEYS，保持顺序（第一个为当前签发密钥）"""
+    keys: "OrderedDict[str, bytes]" = OrderedDict()
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(":")
+        if not sep or not kid or not secret or "." in kid:
+            raise RuntimeError(f"Invalid TOKEN_SIGNING_KEYS entry for key id '{kid}'")
+        keys[kid] = secret.encode()
+    return keys
+
+
+SIGNING_KEYS = parse_signing_keys(TOKEN_SIGNING_KEYS)
+if TOKEN_MODE not in ("table", "signed"):
+    raise RuntimeError(f"Unknown TOKEN_MODE: {TOKEN_MODE}")
+if TOKEN_MODE == "signed" and not SIGNING_KEYS:
+    raise RuntimeError("TOKEN_MODE=signed requires TOKEN_SIGNING_KEYS")
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def create_signed_token(user_id: str, expires_at: datetime) -> str:
+    """用当前密钥签发自包含 token"""
+    kid, key = next(iter(SIGNING_KEYS.items()))
+    payload = f"{user_id}.{int(expires_at.timestamp())}.{kid}".encode()
+    signature = hmac.new(key, payload, hashlib.sha256).digest()
+    return f"{SIGNED_TOKEN_PREFIX}{_b64encode(payload)}.{_b64encode(signature)}"
+
+
+def verify_signed_token(token: str) -> Optional[Tuple[str, datetime]]:
+    """纯 CPU 校验签名 token，成功返回 (user_id, 过期时间)，失败返回 None"""
+    if not token.startswith(SIGNED_TOKEN_PREFIX):
+        return None
+    try:
+        payload_part, signature_part = token[len(SIGNED_TOKEN_PREFIX):].split(".")
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+        user_id, expires_ts, kid = payload.decode().split(".")
+        expires_ts = int(expires_ts)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    key = SIGNING_KEYS.get(kid)
+    if key is None:
+        return None
+    expected = hmac.new(key, payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        return None
+    if expires_ts <= time.time():
+        return None
+    return user_id, datetime.fromtimestamp(expires_ts, tz=timezone.utc)
+
+
+def seconds_until(dt: datetime) -> float:
+    """距离某个时间点还有多少秒（naive datetime 视为 UTC）"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - datetime.now(timezone.utc)).total_seconds()
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def reject_token(token: str):
+    """记录被拒绝的 token 并返回 401"""
+    invalid_token_cache.set(token_digest(token), True)
+    raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+
+def authenticate_token(db: Session, token: str, ip: Optional[str] = None) -> User:
+    """校验 token 并返回对应用户（优先走缓存，未命中时只查一次库）"""
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    if invalid_token_cache.get(token_digest(token)) is not None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == db_token.email).first()
-    db.close()
+
+    if token.startswith(SIGNED_TOKEN_PREFIX):
+        # 签名 token：签名和过期时间在内存中校验，不查 tokens 表
+        claims = verify_signed_token(token)
+        if claims is None:
+            reject_token(token)
+        user_id, expires_at = claims
+        if ip is not None:
+            auth_lookup_rate_limiter.check(ip)
+        user = db.query(User).filter(User.id == user_id).first()
+    else:
+        if ip is not None:
+            auth_lookup_rate_limiter.check(ip)
+        # token 和用户用一条 JOIN 查询取回
+        row = (
+            db.query(Token.expires_at, User)
+            .join(User, User.email == Token.email)
+            .filter(Token.token == token)
+            .first()
+        )
+        # if not db_token or db_token.expires_at < datetime.now(timezone.utc):
+        # if not db_token or db_token.expires_at < datetime.utcnow():
+        if not row or safe_compare(row.expires_at, datetime.now(timezone.utc)):
+            reject_token(token)
+        expires_at, user = row.expires_at, row.User
+
+    if user is None:
+        reject_token(token)
+    # 用户对象会被缓存并跨请求共享，从当前 session 中移出，避免被后续 commit 过期
+    db.expunge(user)
+    # 缓存时间不能超过 token 本身的有效期
+    token_cache.set(token, user, ttl=seconds_until(expires_at))
     return user
 
 
+def get_current_user(
+    request: Request,
+    authorization: str = Header(...),
+    db: Session = Depends(get_db)
+):
+    """获取当前用户（与接口共用同一个请求级 session）"""
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid token header")
+    token = authorization.split(" ")[1]
+    return authenticate_token(db, token, client_ip(request))
+
+
+# ✅ 过期 token 清理
+token_purge_stats = {
+    "runs": 0,
+    "last_run_at": None,
+    "last_purged": 0,
+    "last_duration_ms": 0,
+    "total_purged": 0,
+}
+
+
+def purge_expired_tokens(batch_size: int = TOKEN_PURGE_BATCH_SIZE) -> int:
+    """分批删除过期 token，每批单独提交，避免长时间持有 SQLite 写锁"""
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    purged = 0
+    while True:
+        db = SessionLocal()
+        try:
+            expired = select(Token.token).where(Token.expires_at < now).limit(batch_size)
+            result = db.execute(
+                delete(Token).where(Token.token.in_(expired)),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+        finally:
+            db.close()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            break
+
+    token_purge_stats["runs"] += 1
+    token_purge_stats["last_run_at"] = now.isoformat()
+    token_purge_stats["last_purged"] = purged
+    token_purge_stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    token_purge_stats["total_purged"] += purged
+    return purged
+
+
+async def token_purge_loop():
+    """后台定期清理过期 token"""
+    while True:
+        try:
+            await asyncio.to_thread(purge_expired_tokens)
+        except Exception as e:
+            print(f"⚠️ Token purge failed: {e}")
+        await asyncio.sleep(TOKEN_PURGE_INTERVAL)
+
+
 # Response Serializers (替代 Pydantic response_model)
-def serialize_question(q: Question) -> Dict[str, Any]:
-    """序列化问题对象"""
+# 支持 fields= 的接口可选的字段（顺序即输出顺序）
+QUESTION_FIELDS = ("id", "question_text", "tag", "inspiring_words")
+ANSWER_FIELDS = ("id", "content", "created_at", "question_id", "question_text")
+
+
+def serialize_question(q: Question, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """序列化问题对象，指定 fields 时只读取并输出这些字段"""
+    if fields is not None:
+        return {name: getattr(q, name) for name in fields}
     return {
         "id": q.id,
         "question_text": q.question_text,
@@ -268,6 +988,29 @@ def serialize_question(q: Question) -> Dict[str, Any]:
     }
 
 
+def pick_fields(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """从已序列化的字典（如问题目录快照）中取出指定字段"""
+    if fields is None:
+        return data
+    return {name: data[name] for name in fields}
+
+
+def question_load_only(fields: Optional[List[str]]) -> list:
+    """把 fields 下推到 SELECT 的列清单"""
+    if fields is None:
+        return []
+    return [load_only(*[getattr(Question, name) for name in fields])]
+
+
+def answer_load_only(fields: Optional[List[str]]) -> list:
+    """Answer + Question 联合查询的列清单：只读取输出需要的列"""
+    if fields is None:
+        return []
+    answer_columns = [getattr(Answer, name) for name in fields if name in ("content", "created_at", "question_id")]
+    question_columns = [Question.question_text] if "question_text" in fields else []
+    return [load_only(Answer.id, *answer_columns), load_only(Question.id, *question_columns)]
+
+
 def serialize_question_with_public(q: Question) -> Dict[str, Any]:
     """序列化问题对象（包含公开状态）"""
     return {
@@ -280,8 +1023,20 @@ def serialize_question_with_public(q: Question) -> Dict[str, Any]:
     }
 
 
-def serialize_answer_with_question(answer: Answer, question: Question) -> Dict[str, Any]:
-    """序列化答案和问题"""
+def serialize_answer_with_question(
+    answer: Answer, question: Question, fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """序列化答案和问题，指定 fields 时只读取并输出这些字段"""
+    if fields is not None:
+        data = {}
+        for name in fields:
+            if name == "question_text":
+                data[name] = question.question_text
+            elif name == "created_at":
+                data[name] = answer.created_at.isoformat()
+            else:
+                data[name] = getattr(answer, name)
+        return data
     return {
         "id": answer.id,
         "content": answer.content,
@@ -300,9 +1055,9 @@ def serialize_user_info(user: User) -> Dict[str, Any]:
     }
 
 
-def serialize_folder(folder: Folder) -> Dict[str, Any]:
-    """序列化文件夹"""
-    questions = [serialize_question(fq.question) for fq in folder.questions]
+def serialize_folder(folder: Folder, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """序列化文件夹，fields 作用于其中的问题"""
+    questions = [serialize_question(fq.question, fields) for fq in folder.questions]
     return {
         "id": folder.id,
         "name": folder.name,
@@ -311,107 +1066,1346 @@ def serialize_folder(folder: Folder) -> Dict[str, Any]:
     }
 
 
+# ✅ 问题目录快照
+class CatalogSnapshot:
+    """
+    某个版本的问题目录，创建后不再修改；新版本总是整体替换。
+    读取方先取一次快照再使用，ETag 和内容始终来自同一版本。
+    """
+
+    def __init__(self, instance_id: str, version: int, by_id: Dict[str, Dict[str, Any]], ordered_ids: List[str]):
+        self.instance_id = instance_id
+        self.version = version
+        self.by_id = by_id
+        self.ordered_ids = ordered_ids
+        self._all_json: Optional[bytes] = None
+
+    def all_questions(self) -> List[Dict[str, Any]]:
+        by_id = self.by_id
+        return [by_id[qid] for qid in self.ordered_ids]
+
+    def all_json(self) -> bytes:
+        """完整列表的 JSON，每个版本只序列化一次（缓存在该版本的快照上）"""
+        body = self._all_json
+        if body is None:
+            body = json.dumps(self.all_questions(), ensure_ascii=False).encode()
+            self._all_json = body
+        return body
+
+    def page(self, limit: int, after: Optional[str]) -> Tuple[List[Dict[str, Any]], bool]:
+        ordered_ids = self.ordered_ids
+        start = bisect.bisect_right(ordered_ids, after) if after else 0
+        page_ids = ordered_ids[start:start + limit]
+        has_more = start + limit < len(ordered_ids)
+        return [self.by_id[qid] for qid in page_ids], has_more
+
+    def etag(self, variant: str = "") -> str:
+        return f'W/"q{self.instance_id}-{self.version}{variant}"'
+
+
+class QuestionCatalog:
+    """
+    内存中的问题目录，当前版本保存在一个不可变的 CatalogSnapshot 中，带单调递增的版本号
+    只在 create_question / share_question 提交后打补丁，读取时不访问数据库。
+    快照是进程内的：绕过接口直接写库（如 scripts/insert_questions.py）需要重启服务才能生效。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        # 每次进程启动不同，避免多实例/重启后版本号相同但内容不同
+        self.instance_id = secrets.token_hex(4)
+        self.snapshot = CatalogSnapshot(self.instance_id, 0, {}, [])
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    def ensure_loaded(self):
+        """首次使用时从数据库加载全部问题"""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            db = SessionLocal()
+            try:
+                questions = db.query(Question).order_by(Question.id).all()
+                by_id = {q.id: serialize_question(q) for q in questions}
+                ordered_ids = [q.id for q in questions]
+            finally:
+                db.close()
+            self.snapshot = CatalogSnapshot(self.instance_id, self.snapshot.version + 1, by_id, ordered_ids)
+            self.loaded = True
+
+    def current(self) -> CatalogSnapshot:
+        """加载（如需要）并返回当前快照"""
+        self.ensure_loaded()
+        return self.snapshot
+
+    def upsert(self, question: Question):
+        """写入方提交后调用：基于当前快照复制出新版本，一次赋值替换"""
+        with self._lock:
+            old = self.snapshot
+            if not self.loaded:
+                # 未加载（或未启用快照）时只递增版本号，依赖版本号的缓存照样失效
+                self.snapshot = CatalogSnapshot(self.instance_id, old.version + 1, {}, [])
+                return
+            by_id = dict(old.by_id)
+            ordered_ids = old.ordered_ids
+            if question.id not in by_id:
+                ordered_ids = list(ordered_ids)
+                bisect.insort(ordered_ids, question.id)
+            by_id[question.id] = serialize_question(question)
+            self.snapshot = CatalogSnapshot(self.instance_id, old.version + 1, by_id, ordered_ids)
+
+    def etag(self, variant: str = "") -> str:
+        return self.snapshot.etag(variant)
+
+
+question_catalog = QuestionCatalog()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中当前 ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def catalog_response(content: Any, etag: str) -> Response:
+    """带 ETag 的 JSON 响应；content 为 bytes 时直接输出，不再序列化"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if isinstance(content, bytes):
+        return Response(content=content, media_type="application/json", headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
+# ✅ 按 id 批量查询问题
+QUESTION_BATCH_MAX_IDS = 500
+
+
+def validate_question_ids(ids: List[Any]) -> List[str]:
+    """去重并保持顺序，限制单次查询的数量"""
+    if not all(isinstance(qid, str) for qid in ids):
+        raise HTTPException(status_code=422, detail="Question ids must be strings")
+    ids = list(dict.fromkeys(qid.strip() for qid in ids if qid.strip()))
+    if not ids:
+        raise HTTPException(status_code=422, detail="Question ids are required")
+    if len(ids) > QUESTION_BATCH_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {QUESTION_BATCH_MAX_IDS} ids per request")
+    return ids
+
+
+def lookup_questions(db: Session, ids: List[str], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """一次 IN 查询（或直接读目录快照）取回多个问题，返回 {questions: {id: 问题}, missing: [...]}"""
+    if QUESTION_CATALOG_CACHE:
+        by_id = question_catalog.current().by_id
+        found = {qid: pick_fields(by_id[qid], fields) for qid in ids if qid in by_id}
+    else:
+        found = {
+            q.id: serialize_question(q, fields)
+            for q in db.query(Question).options(*question_load_only(fields)).filter(Question.id.in_(ids))
+        }
+    return {
+        "questions": {qid: found[qid] for qid in ids if qid in found},
+        "missing": [qid for qid in ids if qid not in found],
+    }
+
+
+# ✅ 标签统计（按目录版本缓存）
+tag_counts_cache: Dict[str, Any] = {"version": None, "tags": []}
+
+
+def get_tag_counts(db: Session) -> List[Dict[str, Any]]:
+    """每个标签的问题数，一条 GROUP BY 查询；目录版本不变时直接返回缓存"""
+    version = question_catalog.version
+    if tag_counts_cache["version"] == version:
+        return tag_counts_cache["tags"]
+    rows = (
+        db.query(Question.tag, func.count(Question.id))
+        .filter(Question.tag.isnot(None))
+        .group_by(Question.tag)
+        .order_by(func.count(Question.id).desc(), Question.tag)
+        .all()
+    )
+    tags = [{"tag": tag, "count": count} for tag, count in rows]
+    tag_counts_cache.update(version=version, tags=tags)
+    return tags
+
+
+# ✅ 全文搜索
+CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+SEARCH_TOKEN_RE = re.compile(f"[{CJK_CHARS}]+|[^\\W_{CJK_CHARS}]+")
+CJK_RUN_RE = re.compile(f"[{CJK_CHARS}]+")
+
+
+def search_tokens(text_value: Optional[str], for_query: bool = False) -> List[str]:
+    """
+    分词：拉丁字母/数字按单词切分（小写）；中日韩文字切成单字和相邻二元组
+    查询时多字词只用二元组匹配，单字查询用单字匹配
+    """
+    tokens: List[str] = []
+    for run in SEARCH_TOKEN_RE.findall((text_value or "").lower()):
+        if not CJK_RUN_RE.fullmatch(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+            tokens.extend(bigrams if for_query else list(run) + bigrams)
+    return list(dict.fromkeys(tokens))
+
+
+SEARCH_SCOPE_BITS = 24
+SEARCH_KEY_BITS = 63 - SEARCH_SCOPE_BITS
+
+
+def search_hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha256(value.encode()).digest()[:8], "big")
+
+
+def search_rowid(key: str, scope: Optional[str] = None) -> int:
+    """
+    FTS5 的 rowid：由主键哈希得到的稳定整数（VACUUM 后也不会变），冲突时向后探测，见 SearchIndex._resolve_rowids
+    带 scope 时高位是 scope 的哈希，同一用户的记录落在连续的 rowid 区间内，
+    搜索时用 rowid 范围过滤，只扫描该用户的倒排列表片段
+    """
+    if scope is None:
+        return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big", signed=True)
+    return (search_hash(scope) >> (64 - SEARCH_SCOPE_BITS) << SEARCH_KEY_BITS) | (
+        search_hash(key) >> (64 - SEARCH_KEY_BITS)
+    )
+
+
+def search_scope_range(scope: str) -> Tuple[int, int]:
+    low = search_hash(scope) >> (64 - SEARCH_SCOPE_BITS) << SEARCH_KEY_BITS
+    return low, low + (1 << SEARCH_KEY_BITS) - 1
+
+
+def search_next_rowid(rowid: int, scope: Optional[str] = None) -> int:
+    """哈希冲突时探测的下一个 rowid：带 scope 时在该 scope 的区间内循环"""
+    low, high = search_scope_range(scope) if scope is not None else (-(1 << 63), (1 << 63) - 1)
+    return rowid + 1 if rowid < high else low
+
+
+def search_scope_token(scope: str) -> str:
+    """范围词元：写入每条记录，搜索时与关键词 AND 匹配（rowid 区间可能被多个 scope 共用）"""
+    return "s" + hashlib.sha256(scope.encode()).hexdigest()[:24]
+
+
+class SearchIndex:
+    """
+    全文索引：SQLite 使用 FTS5 虚拟表，PostgreSQL 使用带 GIN 索引的 tsvector 表
+    文本在 Python 中分词（见 search_tokens），数据库只存储和匹配词元，因此中文检索不依赖数据库分词器
+    """
+
+    def __init__(self, table: str, source_table: str, columns: List[str], weights: List[str]):
+        self.table = table
+        self.source_table = source_table
+        self.columns = columns
+        # PostgreSQL 的 setweight 等级（A 最高），SQLite bm25 权重按同样顺序换算
+        self.weights = weights
+        self.backend: Optional[str] = None
+
+    def setup(self):
+        """建表（已存在则跳过），数据库不支持时 backend 为 None"""
+        dialect = engine.dialect.name
+        try:
+            with engine.begin() as conn:
+                if dialect == "sqlite":
+                    conn.execute(text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                        f"USING fts5(key UNINDEXED, {', '.join(self.columns)})"
+                    ))
+                    self.backend = "fts5"
+                elif dialect == "postgresql":
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {self.table} "
+                        f"(key VARCHAR PRIMARY KEY, document TSVECTOR NOT NULL)"
+                    ))
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS ix_{self.table}_document "
+                        f"ON {self.table} USING GIN (document)"
+                    ))
+                    self.backend = "tsvector"
+        except Exception as e:
+            print(f"⚠️ Full-text search disabled for {self.source_table}: {e}")
+            self.backend = None
+
+    def _params(self, key: str, values: List[Optional[str]], scope: Optional[str]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"key": key, "rowid": search_rowid(key, scope), "scope": scope}
+        for i, value in enumerate(values):
+            tokens = search_tokens(value)
+            if i == 0 and scope is not None:
+                tokens = [search_scope_token(scope)] + tokens
+            params[f"c{i}"] = tokens if self.backend == "tsvector" else " ".join(tokens)
+        return params
+
+    def index(self, db: Session, key: str, values: List[Optional[str]], scope: Optional[str] = None):
+        """写入或更新一条记录（在调用方的事务中执行），scope 用于按用户隔离"""
+        self.index_many(db, [(key, values, scope)])
+
+    def index_many(self, db: Session, documents: List[Tuple[str, List[Optional[str]], Optional[str]]]):
+        """批量写入或更新 [(key, values, scope)]，每条语句一次 executemany"""
+        if self.backend is None or not documents:
+            return
+        params = [self._params(key, values, scope) for key, values, scope in documents]
+        if self.backend == "fts5":
+            self._resolve_rowids(db, params)
+            placeholders = ", ".join(f":c{i}" for i in range(len(self.columns)))
+            # 只删除本记录自己的行：万一 rowid 被并发写入的其他记录占用，INSERT 报错而不是覆盖它
+            db.execute(text(f"DELETE FROM {self.table} WHERE rowid = :rowid AND key = :key"), params)
+            db.execute(text(
+                f"INSERT INTO {self.table} (rowid, key, {', '.join(self.columns)}) "
+                f"VALUES (:rowid, :key, {placeholders})"
+            ), params)
+        else:
+            document = " || ".join(
+                f"setweight(array_to_tsvector(CAST(:c{i} AS text[])), '{weight}')"
+                for i, weight in enumerate(self.weights)
+            )
+            db.execute(text(
+                f"INSERT INTO {self.table} (key, document) VALUES (:key, {document}) "
+                f"ON CONFLICT (key) DO UPDATE SET document = EXCLUDED.document"
+            ), params)
+
+    def _resolve_rowids(self, db: Session, params: List[Dict[str, Any]]):
+        """
+        哈希 rowid 可能冲突（同一 scope 只有 2^39 个位置，百万条记录时已不可忽略）：
+        已被其他 key 占用时依次探测下一个 rowid，直到遇到本记录已有的行或空位
+        索引只写入和原位更新、不删除行，所以同一 key 每次都会探测到同一个位置
+        先一次查出所有首选 rowid 的占用情况，只有冲突的记录才逐个探测
+        """
+        owners: Dict[int, str] = {
+            row.rowid: row.key for row in db.execute(
+                text(f"SELECT rowid, key FROM {self.table} WHERE rowid IN :rowids")
+                .bindparams(bindparam("rowids", expanding=True)),
+                {"rowids": list({p["rowid"] for p in params})},
+            )
+        }
+        for p in params:
+            rowid = p["rowid"]
+            while owners.get(rowid, p["key"]) != p["key"]:
+                rowid = search_next_rowid(rowid, p["scope"])
+                if rowid not in owners:
+                    owner = db.execute(
+                        text(f"SELECT key FROM {self.table} WHERE rowid = :rowid"), {"rowid": rowid}
+                    ).scalar()
+                    if owner is not None:
+                        owners[rowid] = owner
+            # 同一批中后面的记录也要避开这个位置
+            owners[rowid] = p["key"]
+            p["rowid"] = rowid
+
+    def _match(self, query: str, scope: Optional[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """生成 WHERE 条件和参数，查询里没有可检索的词时返回 None"""
+        if self.backend is None:
+            raise HTTPException(status_code=503, detail="Search is not available on this database")
+        tokens = search_tokens(query, for_query=True)
+        if not tokens:
+            return None
+        if scope is not None:
+            tokens = [search_scope_token(scope)] + tokens
+        if self.backend == "fts5":
+            where = f"{self.table} MATCH :query"
+            params: Dict[str, Any] = {"query": " ".join(f'"{token}"' for token in tokens)}
+            if scope is not None:
+                params["low"], params["high"] = search_scope_range(scope)
+                where += " AND rowid BETWEEN :low AND :high"
+            return where, params
+        tsquery = " & ".join("'" + token.replace("'", "''") + "'" for token in tokens)
+        return "document @@ CAST(:query AS tsquery)", {"query": tsquery}
+
+    def search(
+        self, db: Session, query: str, limit: int, offset: int, scope: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """按相关度排序返回 [(key, score)]，score 越大越相关"""
+        match = self._match(query, scope)
+        if match is None:
+            return []
+        where, params = match
+        params.update(limit=limit, offset=offset)
+        if self.backend == "fts5":
+            # bm25 越小越相关；key 列不参与计算
+            weights = ", ".join(["0.0"] + [str(4.0 - "ABCD".index(w)) for w in self.weights])
+            score = f"-bm25({self.table}, {weights})"
+        else:
+            score = "ts_rank(document, CAST(:query AS tsquery))"
+        rows = db.execute(text(
+            f"SELECT key, {score} AS score FROM {self.table} "
+            f"WHERE {where} ORDER BY score DESC, key LIMIT :limit OFFSET :offset"
+        ), params).all()
+        return [(row.key, row.score) for row in rows]
+
+    def matching_keys(self, query: str, scope: Optional[str] = None):
+        """
+        匹配记录主键的子查询（不计算相关度），用于 IN 条件
+        bm25 需要统计每个词在整张表中的文档数，代价随全表增长；只取主键时代价只与 scope 内的匹配数有关
+        """
+        match = self._match(query, scope)
+        if match is None:
+            return None
+        where, params = match
+        return text(f"SELECT key FROM {self.table} WHERE {where}").bindparams(**params).columns(key=String)
+
+    def count(self, db: Session) -> int:
+        return db.execute(text(f"SELECT COUNT(*) FROM {self.table}")).scalar()
+
+
+question_search_index = SearchIndex(
+    "questions_fts", "questions", ["question_text", "inspiring_words"], ["A", "B"]
+)
+question_search_index.setup()
+
+
+answer_search_index = SearchIndex("answers_fts", "answers", ["content"], ["A"])
+answer_search_index.setup()
+
+
+def backfill_search_index(
+    index: SearchIndex, model, columns: List[str], scope_column: Optional[str] = None,
+    batch_size: int = SEARCH_INDEX_BATCH_SIZE
+) -> int:
+    """补建索引（包括绕过接口直接导入的数据），索引行数与源表行数一致时跳过"""
+    if index.backend is None:
+        return 0
+    db = SessionLocal()
+    try:
+        if index.count(db) == db.query(func.count(model.id)).scalar():
+            return 0
+        fields = [getattr(model, column) for column in columns]
+        if scope_column:
+            fields.append(getattr(model, scope_column))
+        indexed = 0
+        after = ""
+        while True:
+            batch = (
+                db.query(model.id, *fields)
+                .filter(model.id > after)
+                .order_by(model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            index.index_many(db, [
+                (row.id, list(row[1:len(columns) + 1]), row[-1] if scope_column else None)
+                for row in batch
+            ])
+            db.commit()
+            indexed += len(batch)
+            after = batch[-1].id
+        return indexed
+    finally:
+        db.close()
+
+
+def backfill_search_indexes():
+    """启动时在后台补建全文索引"""
+    try:
+        backfill_search_index(question_search_index, Question, ["question_text", "inspiring_words"])
+        backfill_search_index(answer_search_index, Answer, ["content"], scope_column="user_email")
+    except Exception as e:
+        print(f"⚠️ Search index backfill failed: {e}")
+
+
+# ✅ 每日问题选择
+DAILY_QUESTION_COUNT = 3
+daily_question_memo: Dict[str, Any] = {"day": None, "ids": [], "checked_at": 0.0}
+daily_question_lock = threading.Lock()
+
+
+def daily_question_day() -> date:
+    """每日问题对应的日期"""
+    return date.today() + timedelta(days=2)
+
+
+def daily_pick_offsets(day: date, total: int, k: int = DAILY_QUESTION_COUNT) -> List[int]:
+    """由日期哈希出 k 个不重复的位置，同一天结果固定（不使用全局 random）"""
+    picks: List[int] = []
+    salt = 0
+    while len(picks) < min(k, total):
+        digest = hashlib.sha256(f"{day.isoformat()}:{salt}".encode()).digest()
+        offset = int.from_bytes(digest[:8], "big") % total
+        if offset not in picks:
+            picks.append(offset)
+        salt += 1
+    return picks
+
+
+def select_daily_question_ids(db: Session, day: date) -> List[str]:
+    """在按 id 排序的题库中选出当天的问题：只用 COUNT 和按索引的 OFFSET 查询"""
+    if QUESTION_CATALOG_CACHE:
+        ordered_ids = question_catalog.current().ordered_ids
+        return [ordered_ids[i] for i in daily_pick_offsets(day, len(ordered_ids))]
+
+    total = db.query(func.count(Question.id)).scalar()
+    return [
+        db.query(Question.id).order_by(Question.id).offset(offset).limit(1).scalar()
+        for offset in daily_pick_offsets(day, total)
+    ]
+
+
+def schedule_daily_questions(db: Session, day: date) -> List[str]:
+    """读取某天的排期；没有则计算并写入排期表"""
+    entry = db.get(DailySchedule, day)
+    if entry is not None:
+        return entry.question_ids.split(",") if entry.question_ids else []
+
+    ids = select_daily_question_ids(db, day)
+    if not create_daily_schedule(db, day, ids) and len(ids) >= DAILY_QUESTION_COUNT:
+        # 其他进程已经写入了这一天，以它为准
+        entry = db.get(DailySchedule, day)
+        ids = entry.question_ids.split(",") if entry.question_ids else []
+    return ids
+
+
+def create_daily_schedule(db: Session, day: date, ids: List[str]) -> bool:
+    """写入某天的排期，返回是否由本次写入（题库不够或这一天已被其他进程写入时返回 False）"""
+    if len(ids) < DAILY_QUESTION_COUNT:
+        # 题库还不够，不写入排期，等题目导入后再生成
+        return False
+    db.add(DailySchedule(day=day, question_ids=",".join(ids), pinned=False))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def fill_daily_schedule(days_ahead: int = DAILY_SCHEDULE_DAYS_AHEAD) -> int:
+    """提前生成未来若干天的排期（已有的日期和手动固定的排期不会被覆盖），返回新增天数"""
+    start = daily_question_day()
+    db = SessionLocal()
+    try:
+        existing = {
+            row.day for row in db.query(DailySchedule.day).filter(
+                DailySchedule.day >= start,
+                DailySchedule.day < start + timedelta(days=days_ahead)
+            )
+        }
+        added = 0
+        for offset in range(days_ahead):
+            day = start + timedelta(days=offset)
+            if day not in existing and create_daily_schedule(db, day, select_daily_question_ids(db, day)):
+                added += 1
+        return added
+    finally:
+        db.close()
+
+
+async def daily_schedule_loop():
+    """后台定期补齐未来的每日问题排期"""
+    while True:
+        try:
+            await asyncio.to_thread(fill_daily_schedule)
+        except Exception as e:
+            print(f"⚠️ Daily schedule fill failed: {e}")
+        await asyncio.sleep(DAILY_SCHEDULE_INTERVAL)
+
+
+def get_daily_question_ids(db: Session, day: date) -> List[str]:
+    """
+    当天的问题 id：优先用内存结果，过期后按主键读取排期表
+    （运维修改排期后最多 DAILY_SCHEDULE_REFRESH 秒生效）
+    """
+    memo = daily_question_memo
+    if memo["day"] == day and time.monotonic() - memo["checked_at"] < DAILY_SCHEDULE_REFRESH:
+        return memo["ids"]
+    with daily_question_lock:
+        if memo["day"] != day or time.monotonic() - memo["checked_at"] >= DAILY_SCHEDULE_REFRESH:
+            ids = schedule_daily_questions(db, day)
+            memo.update(day=day, ids=ids, checked_at=time.monotonic())
+        return memo["ids"]
+
+
+# ✅ 答案修订历史
+# 字符级比较的代价约为长度的平方：超过这个总长度的改动先按句子/行比较，只对较小的改动块做字符级比较
+REVISION_CHAR_DIFF_MAX = 1000
+REVISION_SEGMENT_RE = re.compile(r"[^\n。！？!?；;.]*[\n。！？!?；;.]+|[^\n。！？!?；;.]+")
+
+
+def make_revision_delta(old: str, new: str) -> str:
+    """
+    增量：JSON 列表，[起, 止] 表示复制旧文本 old[起:止]，字符串表示插入的新文本
+    例如 [[0, 12], "改写的句子", [20, 48]]
+    先去掉相同的前后缀；剩余部分较长时按句子/行对齐，再对改动的句子做字符级比较，
+    耗时与答案长度近似线性
+    """
+    ops: List[Any] = []
+
+    def copy(i1: int, i2: int):
+        if i2 <= i1:
+            return
+        if ops and isinstance(ops[-1], list) and ops[-1][1] == i1:
+            ops[-1][1] = i2
+        else:
+            ops.append([i1, i2])
+
+    def insert(value: str):
+        if not value:
+            return
+        if ops and isinstance(ops[-1], str):
+            ops[-1] += value
+        else:
+            ops.append(value)
+
+    def char_diff(o1: int, o2: int, n1: int, n2: int):
+        matcher = difflib.SequenceMatcher(None, old[o1:o2], new[n1:n2], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                copy(o1 + i1, o1 + i2)
+            elif tag in ("replace", "insert"):
+                insert(new[n1 + j1:n1 + j2])
+
+    def segment_diff(o1: int, o2: int, n1: int, n2: int):
+        old_segments = REVISION_SEGMENT_RE.findall(old[o1:o2])
+        new_segments = REVISION_SEGMENT_RE.findall(new[n1:n2])
+        old_offsets = [o1]
+        for segment in old_segments:
+            old_offsets.append(old_offsets[-1] + len(segment))
+        new_offsets = [n1]
+        for segment in new_segments:
+            new_offsets.append(new_offsets[-1] + len(segment))
+        # 重复出现很多次的句子（如空行）不作为匹配起点，避免退化为平方复杂度
+        matcher = difflib.SequenceMatcher(None, old_segments, new_segments)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            a1, a2, b1, b2 = old_offsets[i1], old_offsets[i2], new_offsets[j1], new_offsets[j2]
+            if tag == "equal":
+                copy(a1, a2)
+            elif tag == "replace" and (a2 - a1) + (b2 - b1) <= REVISION_CHAR_DIFF_MAX:
+                char_diff(a1, a2, b1, b2)
+            elif tag in ("replace", "insert"):
+                insert(new[b1:b2])
+
+    prefix = len(os.path.commonprefix([old, new]))
+    limit = min(len(old), len(new)) - prefix
+    suffix = 0
+    while suffix < limit and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    o2, n2 = len(old) - suffix, len(new) - suffix
+
+    copy(0, prefix)
+    if (o2 - prefix) + (n2 - prefix) <= REVISION_CHAR_DIFF_MAX:
+        char_diff(prefix, o2, prefix, n2)
+    else:
+        segment_diff(prefix, o2, prefix, n2)
+    copy(o2, len(old))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_revision_delta(old: str, delta: str) -> str:
+    return "".join(old[op[0]:op[1]] if isinstance(op, list) else op for op in json.loads(delta))
+
+
+def record_answer_revision(db: Session, answer: Answer, new_content: str):
+    """
+    在调用方的事务中记录一次修改：首次修改时先把原内容存为版本 1（完整快照），
+    之后每个版本存相对上一版本的增量，每 ANSWER_REVISION_KEYFRAME_INTERVAL 个版本存一次完整快照；
+    增量不比原文短时也直接存完整快照
+    """
+    latest = (
+        db.query(AnswerRevision)
+        .filter(AnswerRevision.answer_id == answer.id)
+        .order_by(AnswerRevision.revision.desc())
+        .first()
+    )
+    now = datetime.now(timezone.utc)
+    if latest is None:
+        latest = AnswerRevision(
+            answer_id=answer.id, revision=1, base_revision=1, is_keyframe=True,
+            data=answer.content or "", created_at=answer.created_at or now,
+        )
+        db.add(latest)
+
+    revision = latest.revision + 1
+    delta = make_revision_delta(answer.content or "", new_content)
+    if revision - latest.base_revision >= ANSWER_REVISION_KEYFRAME_INTERVAL or len(delta) >= len(new_content):
+        db.add(AnswerRevision(
+            answer_id=answer.id, revision=revision, base_revision=revision, is_keyframe=True,
+            data=new_content, created_at=now,
+        ))
+    else:
+        db.add(AnswerRevision(
+            answer_id=answer.id, revision=revision, base_revision=latest.base_revision, is_keyframe=False,
+            data=delta, created_at=now,
+        ))
+
+
+def reconstruct_answer_revision(db: Session, answer_id: str, revision: int) -> Optional[Tuple[str, datetime]]:
+    """还原某个版本：读取所基于的完整快照及其后的增量（一次查询），返回 (内容, 时间)"""
+    target = (
+        db.query(AnswerRevision.base_revision, AnswerRevision.created_at)
+        .filter(AnswerRevision.answer_id == answer_id, AnswerRevision.revision == revision)
+        .first()
+    )
+    if target is None:
+        return None
+    chain = (
+        db.query(AnswerRevision.is_keyframe, AnswerRevision.data)
+        .filter(
+            AnswerRevision.answer_id == answer_id,
+            AnswerRevision.revision >= target.base_revision,
+            AnswerRevision.revision <= revision,
+        )
+        .order_by(AnswerRevision.revision)
+        .all()
+    )
+    content = ""
+    for step in chain:
+        content = step.data if step.is_keyframe else apply_revision_delta(content, step.data)
+    return content, target.created_at
+
+
+# ✅ 草稿写缓冲
+def dialect_insert(table):
+    """当前数据库方言的 INSERT 构造（支持 on_conflict_do_update 做 upsert）"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    raise RuntimeError(f"Upsert is not supported on {engine.dialect.name}")
+
+
+class DraftBuffer:
+    """
+    草稿的写缓冲：同一 (用户, 问题) 的多次保存在内存中合并，只保留最新内容，
+    由后台任务每 DRAFT_FLUSH_INTERVAL 秒在一个事务中批量 upsert。
+    缓冲是进程内的，读取时优先读缓冲；多进程部署时其他进程最多晚一个刷新周期看到最新草稿。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 写库串行化：后台刷新与显式提交不会交错写同一批草稿
+        self._flush_lock = threading.Lock()
+        # (user_email, question_id) -> (content, updated_at, 首次进入缓冲的 monotonic 时间)
+        self._pending: Dict[Tuple[str, str], Tuple[str, datetime, float]] = {}
+        # 正在写库的一批，提交前读取方仍能读到
+        self._inflight: Dict[Tuple[str, str], Tuple[str, datetime, float]] = {}
+        self.saves = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_lag_ms = 0.0
+        self.max_flush_lag_ms = 0.0
+        self.last_flush_at: Optional[str] = None
+
+    def put(self, user_email: str, question_id: str, content: str) -> datetime:
+        updated_at = datetime.now(timezone.utc)
+        key = (user_email, question_id)
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is not None:
+                self.coalesced += 1
+            buffered_at = previous[2] if previous is not None else time.monotonic()
+            self._pending[key] = (content, updated_at, buffered_at)
+            self.saves += 1
+            full = len(self._pending) >= DRAFT_MAX_PENDING
+        if full:
+            self.flush()
+        return updated_at
+
+    def get(self, user_email: str, question_id: str) -> Optional[Tuple[str, datetime]]:
+        key = (user_email, question_id)
+        with self._lock:
+            entry = self._pending.get(key) or self._inflight.get(key)
+        return None if entry is None else (entry[0], entry[1])
+
+    def discard(self, user_email: str, question_ids: List[str]):
+        """
+        丢弃缓冲中的草稿：先等正在进行的刷新结束，避免它在之后又把草稿写回。
+        刷新要拿数据库写锁，调用方不能在已写库的事务中调用，否则两边互相等待
+        """
+        with self._flush_lock:
+            with self._lock:
+                for question_id in question_ids:
+                    self._pending.pop((user_email, question_id), None)
+
+    def flush(self, keys: Optional[List[Tuple[str, str]]] = None) -> int:
+        """把缓冲中的草稿（或指定的 keys）写入数据库，返回写入条数"""
+        with self._flush_lock:
+            with self._lock:
+                if keys is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {key: self._pending.pop(key) for key in keys if key in self._pending}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            db = SessionLocal()
+            try:
+                # 问题不存在的草稿直接丢弃，避免外键错误让整批失败
+                question_ids = {question_id for _, question_id in batch}
+                existing = {row.id for row in db.query(Question.id).filter(Question.id.in_(question_ids))}
+                rows = [
+                    {
+                        "id": str(uuid4()),
+                        "user_email": user_email,
+                        "question_id": question_id,
+                        "content": content,
+                        "updated_at": updated_at,
+                    }
+                    for (user_email, question_id), (content, updated_at, _) in batch.items()
+                    if question_id in existing
+                ]
+                if rows:
+                    stmt = dialect_insert(Draft)
+                    db.execute(stmt.on_conflict_do_update(
+                        index_elements=[Draft.user_email, Draft.question_id],
+                        set_={"content": stmt.excluded.content, "updated_at": stmt.excluded.updated_at},
+                    ), rows)
+                    db.commit()
+            except Exception:
+                db.rollback()
+                self._restore(batch)
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                db.close()
+                with self._lock:
+                    self._inflight = {}
+
+            lag_ms = (time.monotonic() - min(entry[2] for entry in batch.values())) * 1000
+            with self._lock:
+                self.flushes += 1
+                self.flushed += len(rows)
+                self.dropped += len(batch) - len(rows)
+                self.last_batch_size = len(rows)
+                self.max_batch_size = max(self.max_batch_size, len(rows))
+                self.last_flush_lag_ms = round(lag_ms, 2)
+                self.max_flush_lag_ms = max(self.max_flush_lag_ms, self.last_flush_lag_ms)
+                self.last_flush_at = datetime.now(timezone.utc).isoformat()
+            return len(rows)
+
+    def _restore(self, batch: Dict[Tuple[str, str], Tuple[str, datetime, float]]):
+        """写库失败时放回缓冲；期间有更新的版本则以新版本为准"""
+        with self._lock:
+            for key, entry in batch.items():
+                self._pending.setdefault(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+            oldest = min((entry[2] for entry in self._pending.values()), default=None)
+        return {
+            "pending": pending,
+            "oldest_pending_ms": round((time.monotonic() - oldest) * 1000, 2) if oldest is not None else 0.0,
+            "saves": self.saves,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "last_flush_lag_ms": self.last_flush_lag_ms,
+            "max_flush_lag_ms": self.max_flush_lag_ms,
+            "last_flush_at": self.last_flush_at,
+            "flush_interval_seconds": DRAFT_FLUSH_INTERVAL,
+        }
+
+
+draft_buffer = DraftBuffer()
+
+
+def delete_drafts(db: Session, user_email: str, question_ids: List[str]):
+    """
+    删除草稿：清掉缓冲，并在 db 的当前事务中删除已落库的草稿（由调用方提交）
+    必须在本事务的其他写操作之前调用（见 DraftBuffer.discard）
+    """
+    draft_buffer.discard(user_email, question_ids)
+    db.query(Draft).filter(
+        Draft.user_email == user_email, Draft.question_id.in_(question_ids)
+    ).delete(synchronize_session=False)
+
+
+async def draft_flush_loop():
+    """后台定期把缓冲的草稿写入数据库"""
+    while True:
+        await asyncio.sleep(DRAFT_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(draft_buffer.flush)
+        except Exception as e:
+            print(f"⚠️ Draft flush failed: {e}")
+
+
+# ✅ 写作统计（写入答案时增量维护，读取时不扫描 answers.content）
+STATS_COLUMNS = ("answer_count", "char_count", "word_count")
+WORD_COUNT_RE = re.compile(f"[{CJK_CHARS}]|[^\\W_{CJK_CHARS}]+(?:['’][^\\W_{CJK_CHARS}]+)*")
+
+
+def text_stats(text_value: Optional[str]) -> Tuple[int, int]:
+    """
+    返回 (字符数, 字数)：字符数不含空白；
+    中日韩文字每个字算一个字，拉丁字母/数字按单词算一个字（it's 算一个）
+    """
+    text_value = text_value or ""
+    chars = len(text_value) - sum(1 for ch in text_value if ch.isspace())
+    return chars, len(WORD_COUNT_RE.findall(text_value))
+
+
+def add_stats_delta(
+    deltas: Dict[str, List[int]], tag: Optional[str], content: Optional[str], answers: int = 1, sign: int = 1
+):
+    """把一条答案计入 deltas（tag -> [答案数, 字符数, 字数]），sign=-1 表示扣除"""
+    chars, words = text_stats(content)
+    entry = deltas.setdefault(tag or "", [0, 0, 0])
+    entry[0] += answers * sign
+    entry[1] += chars * sign
+    entry[2] += words * sign
+
+
+def apply_user_stats(db: Session, user_email: str, deltas: Dict[str, List[int]]):
+    """在当前事务中把 deltas 累加到 user_stats 和 user_tag_stats（upsert，并发写入也不会丢失）"""
+    if not deltas:
+        return
+    totals = dict(zip(STATS_COLUMNS, (sum(column) for column in zip(*deltas.values()))))
+    stmt = dialect_insert(UserStats)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_email],
+        set_={
+            **{name: getattr(UserStats, name) + getattr(stmt.excluded, name) for name in STATS_COLUMNS},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ), [{"user_email": user_email, "updated_at": datetime.now(timezone.utc), **totals}])
+
+    stmt = dialect_insert(UserTagStats)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserTagStats.user_email, UserTagStats.tag],
+        set_={name: getattr(UserTagStats, name) + getattr(stmt.excluded, name) for name in STATS_COLUMNS},
+    ), [
+        {"user_email": user_email, "tag": tag, **dict(zip(STATS_COLUMNS, values))}
+        for tag, values in sorted(deltas.items())
+    ])
+
+
+def replace_user_stats(db: Session, user_email: str, deltas: Dict[str, List[int]]):
+    """用重新计算的结果覆盖某用户的统计（scripts/rebuild_user_stats.py 使用）"""
+    db.query(UserTagStats).filter(UserTagStats.user_email == user_email).delete()
+    db.query(UserStats).filter(UserStats.user_email == user_email).delete()
+    apply_user_stats(db, user_email, deltas)
+
+
+def serialize_stats(row) -> Dict[str, Any]:
+    """统计行（没有时为 None）转为接口输出，附带平均长度"""
+    count = row.answer_count if row else 0
+    chars = row.char_count if row else 0
+    words = row.word_count if row else 0
+    return {
+        "answer_count": count,
+        "char_count": chars,
+        "word_count": words,
+        "average_chars": round(chars / count, 1) if count else 0,
+        "average_words": round(words / count, 1) if count else 0,
+    }
+
+
 # Endpoints
 @app.post("/api/auth/signup")
-async def signup(data: Dict[str, Any]):
+def signup(data: Dict[str, Any], db: Session = Depends(get_db)):
     validated = validate_user_create(data)
-    db = SessionLocal()
     existing_user = db.query(User).filter(User.email == validated["email"]).first()
     if existing_user:
-        db.close()
         raise HTTPException(status_code=400, detail="Email already registered")
-    new_user = User(email=validated["email"], hashed_password=hash_password(validated["password"]))
+    hashed_password = password_hash_pool.run(hash_password, validated["password"])
+    new_user = User(email=validated["email"], hashed_password=hashed_password)
     db.add(new_user)
     db.commit()
-    db.close()
     return {"message": "User registered successfully"}
 
 
 @app.post("/api/auth/login")
-async def login(data: Dict[str, Any]):
+def login(request: Request, data: Dict[str, Any], db: Session = Depends(get_db)):
+    login_rate_limiter.check(client_ip(request))
     validated = validate_user_create(data)
-    db = SessionLocal()
     db_user = db.query(User).filter(User.email == validated["email"]).first()
-    if not db_user or not verify_password(validated["password"], db_user.hashed_password):
-        db.close()
+    if not db_user or not password_hash_pool.run(
+        verify_password, validated["password"], db_user.hashed_password
+    ):
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    token = generate_token()
+    # 旧格式（SHA-256）或参数已变更的密码，登录成功时透明升级
+    if password_needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = password_hash_pool.run(hash_password, validated["password"])
     expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
-    new_token = Token(token=token, email=validated["email"], expires_at=expires_at)
-    db.add(new_token)
+    if TOKEN_MODE == "signed":
+        token = create_signed_token(db_user.id, expires_at)
+    else:
+        token = generate_token()
+        new_token = Token(token=token, email=validated["email"], expires_at=expires_at)
+        db.add(new_token)
     db.commit()
-    db.close()
     return {"access_token": token, "token_type": "bearer"}
 
 
 @app.get("/api/question/{question_id}")
-def get_question(question_id: str):
-    db = SessionLocal()
-    question = db.query(Question).filter(Question.id == question_id).first()
-    db.close()
+def get_question(
+    question_id: str,
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    if QUESTION_CATALOG_CACHE:
+        catalog = question_catalog.current()
+        etag = catalog.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        question = catalog.by_id.get(question_id)
+        if question is None:
+            raise HTTPException(status_code=404, detail="Question not found")
+        return catalog_response(pick_fields(question, fields), etag)
+
+    question = (
+        db.query(Question)
+        .options(*question_load_only(fields))
+        .filter(Question.id == question_id)
+        .first()
+    )
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    return serialize_question(question)
+    return serialize_question(question, fields)
+
+
+def stream_questions_json(after: Optional[str] = None, fields: Optional[List[str]] = None):
+    """按 id 顺序分批读取问题，逐块输出 JSON 数组，内存占用与题库大小无关"""
+    # 流式响应在接口返回后才被消费，使用独立的 session
+    db = SessionLocal()
+    try:
+        query = db.query(Question).options(*question_load_only(fields)).order_by(Question.id)
+        if after:
+            query = query.filter(Question.id > after)
+        yield "["
+        chunk = []
+        first = True
+        for q in query.yield_per(STREAM_BATCH_SIZE):
+            chunk.append(("" if first else ",") + json.dumps(serialize_question(q, fields), ensure_ascii=False))
+            first = False
+            if len(chunk) >= STREAM_BATCH_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+        yield "]"
+    finally:
+        db.close()
 
 
 @app.get("/api/all_questions")
-def get_all_questions(db: Session = Depends(get_db)):
-    questions = db.query(Question).all()
-    return [serialize_question(q) for q in questions]
+def get_all_questions(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不传则流式返回全部"),
+    after: Optional[str] = Query(None, description="游标：上一页最后一个问题的 id"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    获取问题列表
+    传 limit 时按 id 做 keyset 分页，返回 {"items": [...], "next_after": 下一页游标或 null}
+    """
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    if QUESTION_CATALOG_CACHE:
+        catalog = question_catalog.current()
+        etag = catalog.etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        if limit is None:
+            if after or fields is not None:
+                items = catalog.page(len(catalog.ordered_ids), after)[0]
+                return catalog_response([pick_fields(item, fields) for item in items], etag)
+            return catalog_response(catalog.all_json(), etag)
+        items, has_more = catalog.page(limit, after)
+        return catalog_response({
+            "items": [pick_fields(item, fields) for item in items],
+            "next_after": items[-1]["id"] if has_more else None,
+        }, etag)
+
+    if limit is None:
+        return StreamingResponse(stream_questions_json(after, fields), media_type="application/json")
+
+    query = db.query(Question).options(*question_load_only(fields)).order_by(Question.id)
+    if after:
+        query = query.filter(Question.id > after)
+    questions = query.limit(limit + 1).all()
+    has_more = len(questions) > limit
+    questions = questions[:limit]
+    return {
+        "items": [serialize_question(q, fields) for q in questions],
+        "next_after": questions[-1].id if has_more else None,
+    }
 
 
-@app.post("/api/answer")
-async def save_answer(data: Dict[str, Any], authorization: str = Header(...)):
-    validated = validate_answer_create(data)
-    db = SessionLocal()
+@app.get("/api/questions")
+def list_questions(
+    tag: Optional[str] = Query(None, description="按标签筛选"),
+    is_public: Optional[bool] = Query(None, description="按公开状态筛选"),
+    limit: int = Query(50, ge=1, le=500, description="每页数量"),
+    after: Optional[str] = Query(None, description="游标：上一页最后一个问题的 id"),
+    ids: Optional[str] = Query(None, description="按 id 批量查询，逗号分隔"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    db: Session = Depends(get_db)
+):
+    """
+    按标签列出问题（走 (tag, id) / (tag, is_public, id) 索引），keyset 分页
+    传 ids 时改为按 id 批量查询（忽略其他筛选参数），返回 {"questions": {id: 问题}, "missing": [...]}
+    """
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    if ids is not None:
+        return lookup_questions(db, validate_question_ids(ids.split(",")), fields)
+    query = db.query(Question).options(*question_load_only(fields))
+    if tag is not None:
+        query = query.filter(Question.tag == tag)
+    if is_public is not None:
+        query = query.filter(Question.is_public == is_public)
+    if after:
+        query = query.filter(Question.id > after)
+    questions = query.order_by(Question.id).limit(limit + 1).all()
+    has_more = len(questions) > limit
+    questions = questions[:limit]
+    return {
+        "items": [serialize_question(q, fields) for q in questions],
+        "next_after": questions[-1].id if has_more else None,
+    }
 
-    if not authorization.startswith("Bearer "):
-        db.close()
-        raise HTTPException(status_code=401, detail="Invalid Authorization header format")
-    token = authorization.split(" ")[1]
 
-    db_token = db.query(Token).filter(Token.token == token).first()
-    # if not db_token or db_token.expires_at < datetime.now(timezone.utc):
-    if not db_token or safe_compare(db_token.expires_at, datetime.now(timezone.utc)):
-        db.close()
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+@app.post("/api/questions/batch")
+def batch_get_questions(data: Dict[str, Any], db: Session = Depends(get_db)):
+    """按 id 批量查询问题（POST 形式，适合 id 较多、URL 过长的情况）"""
+    ids = data.get("ids")
+    if not isinstance(ids, list):
+        raise HTTPException(status_code=422, detail="ids must be a list")
+    fields = data.get("fields")
+    if isinstance(fields, list):
+        fields = ",".join(str(name) for name in fields)
+    elif fields is not None and not isinstance(fields, str):
+        raise HTTPException(status_code=422, detail="fields must be a list or a comma-separated string")
+    return lookup_questions(db, validate_question_ids(ids), validate_fields(fields, QUESTION_FIELDS))
+
+
+@app.get("/api/questions/search")
+def search_questions(
+    q: str = Query(..., min_length=1, description="搜索关键词"),
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    offset: int = Query(0, ge=0, description="偏移量"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    db: Session = Depends(get_db)
+):
+    """全文搜索问题（question_text 和 inspiring_words），按相关度排序"""
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    hits = question_search_index.search(db, q, limit + 1, offset)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    ids = [key for key, _ in hits]
+
+    if QUESTION_CATALOG_CACHE:
+        by_id = question_catalog.current().by_id
+        found = {qid: pick_fields(by_id[qid], fields) for qid in ids if qid in by_id}
+    else:
+        found = {
+            question.id: serialize_question(question, fields)
+            for question in db.query(Question).options(*question_load_only(fields)).filter(Question.id.in_(ids))
+        }
+
+    items = [{**found[key], "score": round(score, 6)} for key, score in hits if key in found]
+    return {
+        "items": items,
+        "next_offset": offset + limit if has_more else None,
+    }
+
+
+@app.get("/api/questions/tags")
+def list_question_tags(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """所有标签及对应的问题数"""
+    etag = question_catalog.etag("-tags")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return catalog_response(get_tag_counts(db), etag)
+
 
+@app.post("/api/answer")
+def save_answer(
+    data: Dict[str, Any],
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    validated = validate_answer_create(data)
+    # 答案提交后草稿随之删除；要在写入答案之前做，见 delete_drafts
+    delete_drafts(db, user.email, [validated["question_id"]])
     new_answer = Answer(
-        user_email=db_token.email,
+        user_email=user.email,
         content=validated["content"],
         created_at=datetime.now(timezone.utc),
         question_id=validated["question_id"],
     )
     db.add(new_answer)
+    db.flush()
+    answer_search_index.index(db, new_answer.id, [new_answer.content], user.email)
+    deltas: Dict[str, List[int]] = {}
+    tag = db.query(Question.tag).filter(Question.id == new_answer.question_id).scalar()
+    add_stats_delta(deltas, tag, new_answer.content)
+    apply_user_stats(db, user.email, deltas)
     db.commit()
-    db.close()
 
     return {"message": "Answer saved successfully"}
 
 
-@app.get("/api/answer")
-def get_answers(question_id: str = Query(...), authorization: str = Header(...)):
-    db = SessionLocal()
+ANSWER_BATCH_MAX_ITEMS = 1000
 
-    if not authorization.startswith("Bearer "):
-        db.close()
-        raise HTTPException(status_code=401, detail="Invalid Authorization header format")
-    token = authorization.split(" ")[1]
-    db_token = db.query(Token).filter(Token.token == token).first()
-    # if not db_token or db_token.expires_at < datetime.now(timezone.utc):
-    if not db_token or safe_compare(db_token.expires_at, datetime.now(timezone.utc)):    
-        db.close()
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+def parse_answer_created_at(value: Any, field: str = "created_at") -> datetime:
+    """离线客户端/导入数据可带原始时间（ISO 8601），不带时区按 UTC 处理；field 用于错误信息"""
+    if value is None:
+        return datetime.now(timezone.utc)
+    try:
+        created_at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid {field} format")
+    if created_at.tzinfo is None:
+        return created_at.replace(tzinfo=timezone.utc)
+    return created_at.astimezone(timezone.utc)
+
+
+@app.post("/api/answers/batch")
+def save_answers_batch(
+    data: Dict[str, Any],
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    批量保存答案：逐条校验，一次查询确认问题存在，合法的答案在同一个事务中 executemany 插入
+    返回每条的结果 {"index", "status": "created" | "error", "id" | "detail"}
+    """
+    items = data.get("answers")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="answers must be a list")
+    if len(items) > ANSWER_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {ANSWER_BATCH_MAX_ITEMS} answers per request")
+
+    results: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, Dict[str, Any]]] = []
+    for i, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise HTTPException(status_code=422, detail="Answer must be an object")
+            if not all(isinstance(item.get(key, ""), str) for key in ("content", "question_id")):
+                raise HTTPException(status_code=422, detail="content and question_id must be strings")
+            validated = validate_answer_create(item)
+            validated["created_at"] = parse_answer_created_at(item.get("created_at"))
+        except HTTPException as e:
+            results.append({"index": i, "status": "error", "detail": e.detail})
+            continue
+        results.append(None)
+        pending.append((i, validated))
+
+    question_ids = {validated["question_id"] for _, validated in pending}
+    existing = {
+        row.id: row.tag for row in db.query(Question.id, Question.tag).filter(Question.id.in_(question_ids))
+    } if question_ids else {}
+
+    rows = []
+    deltas: Dict[str, List[int]] = {}
+    for i, validated in pending:
+        if validated["question_id"] not in existing:
+            results[i] = {"index": i, "status": "error", "detail": "Question not found"}
+            continue
+        answer_id = str(uuid4())
+        rows.append({
+            "id": answer_id,
+            "user_email": user.email,
+            "content": validated["content"],
+            "created_at": validated["created_at"],
+            "question_id": validated["question_id"],
+        })
+        results[i] = {"index": i, "status": "created", "id": answer_id}
+        add_stats_delta(deltas, existing[validated["question_id"]], validated["content"])
+
+    if rows:
+        # 已提交问题的草稿随之删除；同样要在写入答案之前做，见 delete_drafts
+        delete_drafts(db, user.email, sorted({row["question_id"] for row in rows}))
+        db.execute(insert(Answer), rows)
+        answer_search_index.index_many(db, [(row["id"], [row["content"]], user.email) for row in rows])
+        apply_user_stats(db, user.email, deltas)
+        db.commit()
+
+    return {
+        "created": len(rows),
+        "failed": len(items) - len(rows),
+        "results": results,
+    }
+
+
+@app.get("/api/answer")
+def get_answers(
+    question_id: str = Query(...),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    fields = validate_fields(fields, ANSWER_FIELDS)
     answers = (
         db.query(Answer, Question)
         .join(Question, Answer.question_id == Question.id)
-        .filter(Answer.user_email == db_token.email, Answer.question_id == question_id)
+        .options(*answer_load_only(fields))
+        .filter(Answer.user_email == user.email, Answer.question_id == question_id)
         .all()
     )
-    db.close()
 
-    return [serialize_answer_with_question(a.Answer, a.Question) for a in answers]
+    return [serialize_answer_with_question(a.Answer, a.Question, fields) for a in answers]
+
+
+@app.put("/api/drafts/{question_id}")
+def save_draft(question_id: str, data: Dict[str, Any], user: User = Depends(get_current_user)):
+    """自动保存草稿：只写入内存缓冲，由后台批量落库"""
+    content = data.get("content")
+    if not isinstance(content, str):
+        raise HTTPException(status_code=422, detail="Content must be a string")
+    updated_at = draft_buffer.put(user.email, question_id, content)
+    return {"question_id": question_id, "updated_at": updated_at.isoformat(), "status": "buffered"}
+
+
+@app.post("/api/drafts/{question_id}/commit")
+def commit_draft(question_id: str, user: User = Depends(get_current_user)):
+    """立即把该草稿写入数据库（如离开页面前）"""
+    draft_buffer.flush([(user.email, question_id)])
+    return {"question_id": question_id, "status": "saved"}
+
+
+@app.get("/api/drafts/{question_id}")
+def get_draft(question_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    buffered = draft_buffer.get(user.email, question_id)
+    if buffered is not None:
+        content, updated_at = buffered
+    else:
+        draft = db.query(Draft).filter(Draft.user_email == user.email, Draft.question_id == question_id).first()
+        if draft is None:
+            raise HTTPException(status_code=404, detail="Draft not found")
+        content, updated_at = draft.content, draft.updated_at
+        # SQLite 读回的是 naive datetime（按 UTC 写入），与缓冲中的统一为带时区的 UTC
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return {"question_id": question_id, "content": content, "updated_at": updated_at.astimezone(timezone.utc).isoformat()}
+
+
+@app.delete("/api/drafts/{question_id}")
+def delete_draft(question_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    delete_drafts(db, user.email, [question_id])
+    db.commit()
+    return {"message": "Draft deleted successfully"}
 
 
 @app.get("/api/me")
@@ -420,45 +2414,101 @@ def me(user=Depends(get_current_user)):
 
 
 @app.get("/api/user/settings")
-def get_user_settings(user: User = Depends(get_current_user)):
-    db = SessionLocal()
-    answers = (
+def get_user_settings(
+    include_answers: Optional[bool] = Query(None, description="兼容旧版：附带全部答案（默认取 USER_SETTINGS_INCLUDE_ANSWERS）"),
+    fields: Optional[str] = Query(None, description="answers 中只返回这些字段，逗号分隔"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """个人资料，答案数量只做计数；答案列表请用 /api/user/answers 分页获取"""
+    fields = validate_fields(fields, ANSWER_FIELDS)
+    profile = {
+        "email": user.email,
+        "username": user.username,
+        "created_at": user.created_at.isoformat(),
+        "answer_count": db.query(func.count(Answer.id)).filter(Answer.user_email == user.email).scalar(),
+    }
+    if include_answers if include_answers is not None else USER_SETTINGS_INCLUDE_ANSWERS:
+        answers = (
+            db.query(Answer, Question)
+            .join(Question, Answer.question_id == Question.id)
+            .options(*answer_load_only(fields))
+            .filter(Answer.user_email == user.email)
+            .all()
+        )
+        profile["answers"] = [serialize_answer_with_question(a.Answer, a.Question, fields) for a in answers]
+    return profile
+
+
+def encode_answer_cursor(answer: Answer) -> str:
+    raw = f"{answer.created_at.isoformat()}|{answer.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_answer_cursor(cursor: str) -> Tuple[datetime, str]:
+    """游标是 (created_at, id) 的 base64 编码，格式错误返回 422"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, answer_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), answer_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+
+@app.get("/api/user/answers")
+def list_user_answers(
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="游标：上一页返回的 next_cursor"),
+    truncate: Optional[int] = Query(None, ge=1, le=10000, description="content 最多返回多少个字符"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    当前用户的答案，按 (created_at, id) 倒序做 keyset 分页，
+    返回 {"items": [...], "next_cursor": 下一页游标或 null}
+    """
+    fields = validate_fields(fields, ANSWER_FIELDS)
+    # 游标需要 created_at
+    load_fields = fields if fields is None or "created_at" in fields else fields + ["created_at"]
+    query = (
         db.query(Answer, Question)
         .join(Question, Answer.question_id == Question.id)
+        .options(*answer_load_only(load_fields))
         .filter(Answer.user_email == user.email)
-        .all()
     )
-    db.close()
-    
-    answer_list = [
-        {
-            "id": a.Answer.id,
-            "question_id": a.Answer.question_id,
-            "question_text": a.Question.question_text,
-            "content": a.Answer.content,
-            "created_at": a.Answer.created_at.isoformat()
-        }
-        for a in answers
-    ]
-    
+    if cursor:
+        created_at, answer_id = decode_answer_cursor(cursor)
+        query = query.filter(
+            Answer.created_at <= created_at,
+            or_(Answer.created_at < created_at, Answer.id < answer_id),
+        )
+    rows = query.order_by(Answer.created_at.desc(), Answer.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for row in rows:
+        item = serialize_answer_with_question(row.Answer, row.Question, fields)
+        if truncate is not None and "content" in item:
+            item["content_truncated"] = len(item["content"]) > truncate
+            item["content"] = item["content"][:truncate]
+        items.append(item)
     return {
-        "email": user.email,
-        "username": user.username,
-        "created_at": user.created_at.isoformat(),
-        "answers": answer_list
+        "items": items,
+        "next_cursor": encode_answer_cursor(rows[-1].Answer) if has_more else None,
     }
 
 
 @app.put("/api/user/settings")
-async def update_user_settings(
+def update_user_settings(
     data: Dict[str, Any],
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     validated = validate_user_settings_update(data)
-    db = SessionLocal()
     db_user = db.query(User).filter(User.id == user.id).first()
     if not db_user:
-        db.close()
         raise HTTPException(status_code=404, detail="User not found")
 
     if validated.get("email"):
@@ -466,43 +2516,102 @@ async def update_user_settings(
     if validated.get("username"):
         db_user.username = validated["username"]
     if validated.get("password"):
-        db_user.hashed_password = hash_password(validated["password"])
+        db_user.hashed_password = password_hash_pool.run(hash_password, validated["password"])
 
     db.commit()
     db.refresh(db_user)
-    db.close()
+    # 用户信息已变更，清掉该用户所有已缓存的 token
+    token_cache.invalidate_where(lambda cached: cached.id == user.id)
     return {"message": "User info updated successfully"}
 
 
 @app.put("/api/answer/{answer_id}")
-async def update_answer(
+def update_answer(
     answer_id: str,
     data: Dict[str, Any],
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     content = data.get("content", "").strip()
     if not content:
         raise HTTPException(status_code=422, detail="Content is required")
     
-    db = SessionLocal()
     answer = db.query(Answer).filter(
         Answer.id == answer_id,
         Answer.user_email == user.email
     ).first()
     if not answer:
-        db.close()
         raise HTTPException(status_code=404, detail="Answer not found")
 
+    if content != answer.content:
+        record_answer_revision(db, answer, content)
+        deltas: Dict[str, List[int]] = {}
+        tag = db.query(Question.tag).filter(Question.id == answer.question_id).scalar()
+        add_stats_delta(deltas, tag, answer.content, answers=0, sign=-1)
+        add_stats_delta(deltas, tag, content, answers=0)
+        apply_user_stats(db, user.email, deltas)
     answer.content = content
-    db.commit()
-    db.close()
+    answer_search_index.index(db, answer.id, [content], user.email)
+    try:
+        db.commit()
+    except IntegrityError:
+        # 同一答案的并发修改抢占了同一个版本号
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Answer was modified concurrently, please retry")
     return {"message": "Answer updated successfully"}
 
 
+def get_own_answer_id(db: Session, answer_id: str, user: User) -> str:
+    owned = db.query(Answer.id).filter(Answer.id == answer_id, Answer.user_email == user.email).first()
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Answer not found")
+    return owned.id
+
+
+@app.get("/api/answer/{answer_id}/revisions")
+def list_answer_revisions(answer_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """答案的修订历史（不含内容），从未修改过的答案返回空列表"""
+    get_own_answer_id(db, answer_id, user)
+    revisions = (
+        db.query(AnswerRevision.revision, AnswerRevision.is_keyframe, AnswerRevision.created_at)
+        .filter(AnswerRevision.answer_id == answer_id)
+        .order_by(AnswerRevision.revision)
+        .all()
+    )
+    return [
+        {
+            "revision": r.revision,
+            "is_keyframe": r.is_keyframe,
+            "created_at": r.created_at.isoformat(),
+        }
+        for r in revisions
+    ]
+
+
+@app.get("/api/answer/{answer_id}/revisions/{revision}")
+def get_answer_revision(
+    answer_id: str,
+    revision: int,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """还原答案的某个历史版本"""
+    get_own_answer_id(db, answer_id, user)
+    restored = reconstruct_answer_revision(db, answer_id, revision)
+    if restored is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    content, created_at = restored
+    return {
+        "answer_id": answer_id,
+        "revision": revision,
+        "content": content,
+        "created_at": created_at.isoformat(),
+    }
+
+
 @app.post("/api/my-questions")
-async def create_question(data: Dict[str, Any], user: User = Depends(get_current_user)):
+def create_question(data: Dict[str, Any], user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     validated = validate_question_create(data)
-    db = SessionLocal()
     q = Question(
         question_text=validated["question_text"],
         tag=validated.get("tag"),
@@ -511,41 +2620,49 @@ async def create_question(data: Dict[str, Any], user: User = Depends(get_current
         is_public=False
     )
     db.add(q)
+    db.flush()
+    # 全文索引与问题在同一个事务中写入
+    question_search_index.index(db, q.id, [q.question_text, q.inspiring_words])
     db.commit()
     db.refresh(q)
+    question_catalog.upsert(q)
     result = serialize_question_with_public(q)
-    db.close()
     return result
 
 
 @app.get("/api/my-questions")
-def list_my_questions(user: User = Depends(get_current_user)):
-    db = SessionLocal()
-    my_questions = db.query(Question).filter(Question.created_by == user.id).all()
-    db.close()
-    return [serialize_question(q) for q in my_questions]
+def list_my_questions(
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    my_questions = (
+        db.query(Question)
+        .options(*question_load_only(fields))
+        .filter(Question.created_by == user.id)
+        .all()
+    )
+    return [serialize_question(q, fields) for q in my_questions]
 
 
 @app.put("/api/my-questions/{question_id}/share")
-def share_question(question_id: str, user: User = Depends(get_current_user)):
-    db = SessionLocal()
+def share_question(question_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     q = db.query(Question).filter(
         Question.id == question_id,
         Question.created_by == user.id
     ).first()
     if not q:
-        db.close()
         raise HTTPException(status_code=404, detail="Question not found or not owned by user")
     q.is_public = True
     db.commit()
-    db.close()
+    question_catalog.upsert(q)
     return {"message": "Question is now public"}
 
 
 @app.post("/api/folders")
-async def create_folder(data: Dict[str, Any], user: User = Depends(get_current_user)):
+def create_folder(data: Dict[str, Any], user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     validated = validate_folder_create(data)
-    db = SessionLocal()
     folder = Folder(
         name=validated["name"],
         user_id=user.id
@@ -555,87 +2672,89 @@ async def create_folder(data: Dict[str, Any], user: User = Depends(get_current_u
     db.refresh(folder)
     _ = folder.questions
     result = serialize_folder(folder)
-    db.close()
     return result
 
 
 @app.get("/api/folders")
-def list_folders(user: User = Depends(get_current_user)):
-    db = SessionLocal()
-    folders = db.query(Folder).filter(Folder.user_id == user.id).all()
-    results = [serialize_folder(f) for f in folders]
-    db.close()
+def list_folders(
+    fields: Optional[str] = Query(None, description="问题只返回这些字段，逗号分隔"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    # 文件夹内的问题一次性预加载，只读取需要的列
+    question_loader = selectinload(Folder.questions).selectinload(FolderQuestion.question)
+    if fields is not None:
+        question_loader = question_loader.load_only(*[getattr(Question, name) for name in fields])
+    folders = db.query(Folder).options(question_loader).filter(Folder.user_id == user.id).all()
+    results = [serialize_folder(f, fields) for f in folders]
     return results
 
 
 @app.put("/api/folders/{folder_id}")
-async def rename_folder(folder_id: str, data: Dict[str, Any], user: User = Depends(get_current_user)):
+def rename_folder(folder_id: str, data: Dict[str, Any], user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     validated = validate_folder_create(data)
-    db = SessionLocal()
     folder = db.query(Folder).filter(Folder.id == folder_id, Folder.user_id == user.id).first()
     if not folder:
-        db.close()
         raise HTTPException(status_code=404, detail="Folder not found")
     folder.name = validated["name"]
     db.commit()
-    db.close()
     return {"message": "Folder renamed successfully"}
 
 
 @app.delete("/api/folders/{folder_id}")
-def delete_folder(folder_id: str, user: User = Depends(get_current_user)):
-    db = SessionLocal()
+def delete_folder(folder_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     folder = db.query(Folder).filter(Folder.id == folder_id, Folder.user_id == user.id).first()
     if not folder:
-        db.close()
         raise HTTPException(status_code=404, detail="Folder not found")
     db.delete(folder)
     db.commit()
-    db.close()
     return {"message": "Folder deleted successfully"}
 
 
 @app.post("/api/folders/{folder_id}/questions")
-async def add_question_to_folder(folder_id: str, question_id: str, user: User = Depends(get_current_user)):
-    db = SessionLocal()
+def add_question_to_folder(folder_id: str, question_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     folder = db.query(Folder).filter(Folder.id == folder_id, Folder.user_id == user.id).first()
     if not folder:
-        db.close()
         raise HTTPException(status_code=404, detail="Folder not found")
 
     fq = FolderQuestion(folder_id=folder_id, question_id=question_id)
     db.add(fq)
     db.commit()
-    db.close()
     return {"message": "Question added to folder successfully"}
 
 
 @app.delete("/api/folders/{folder_id}/questions/{question_id}")
-def remove_question_from_folder(folder_id: str, question_id: str, user: User = Depends(get_current_user)):
-    db = SessionLocal()
+def remove_question_from_folder(folder_id: str, question_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     fq = db.query(FolderQuestion).join(Folder).filter(
         FolderQuestion.folder_id == folder_id,
         FolderQuestion.question_id == question_id,
         Folder.user_id == user.id
     ).first()
     if not fq:
-        db.close()
         raise HTTPException(status_code=404, detail="Question not in folder")
     db.delete(fq)
     db.commit()
-    db.close()
     return {"message": "Question removed from folder successfully"}
 
 
+def answer_day_column():
+    """answers.created_at 按天截断为 YYYY-MM-DD 字符串（在数据库中计算）"""
+    if engine.dialect.name == "postgresql":
+        return func.to_char(Answer.created_at, "YYYY-MM-DD")
+    if engine.dialect.name == "sqlite":
+        return func.strftime("%Y-%m-%d", Answer.created_at)
+    raise RuntimeError(f"Day truncation is not supported on {engine.dialect.name}")
+
+
 @app.get("/api/user/activity")
 def get_user_activity(
     year: int = Query(..., ge=1900, le=2100, description="年份"),
     month: int = Query(..., ge=1, le=12, description="月份(1-12)"),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
-    """获取用户某月的写作活跃度统计"""
-    db = SessionLocal()
-    
+    """获取用户某月的写作活跃度统计（按天 GROUP BY，只读索引，不读取答案内容）"""
     try:
         start_date = datetime(year, month, 1)
         if month == 12:
@@ -643,42 +2762,181 @@ def get_user_activity(
         else:
             end_date = datetime(year, month + 1, 1)
         
-        answers = db.query(Answer).filter(
+        day = answer_day_column().label("day")
+        rows = db.query(day, func.count().label("count")).filter(
             Answer.user_email == user.email,
             Answer.created_at >= start_date,
             Answer.created_at < end_date
-        ).all()
-        
-        daily_counts = {}
-        for answer in answers:
-            date_str = answer.created_at.strftime("%Y-%m-%d")
-            daily_counts[date_str] = daily_counts.get(date_str, 0) + 1
+        ).group_by(day).all()
         
         return {
             "year": year,
             "month": month,
-            "daily_counts": daily_counts
+            "daily_counts": {row.day: row.count for row in rows}
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.get("/api/user/stats")
+def get_user_stats(
+    by_tag: bool = Query(False, description="同时返回按标签的统计"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """当前用户的写作统计：答案数、字符数、字数及平均长度（读取 user_stats 一行）"""
+    stats = serialize_stats(db.get(UserStats, user.email))
+    if by_tag:
+        rows = (
+            db.query(UserTagStats)
+            .filter(UserTagStats.user_email == user.email, UserTagStats.answer_count > 0)
+            .order_by(UserTagStats.answer_count.desc(), UserTagStats.tag)
+            .all()
+        )
+        stats["tags"] = [{"tag": row.tag or None, **serialize_stats(row)} for row in rows]
+    return stats
+
+
+@app.get("/api/user/answers/search")
+def search_user_answers(
+    q: str = Query(..., min_length=1, description="搜索关键词"),
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    offset: int = Query(0, ge=0, description="偏移量"),
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """全文搜索当前用户自己的答案，按时间倒序"""
+    fields = validate_fields(fields, ANSWER_FIELDS)
+    keys = answer_search_index.matching_keys(q, user.email)
+    if keys is None:
+        return {"items": [], "next_offset": None}
+
+    rows = (
+        db.query(Answer, Question)
+        .join(Question, Answer.question_id == Question.id)
+        .options(*answer_load_only(fields))
+        .filter(Answer.id.in_(keys), Answer.user_email == user.email)
+        .order_by(Answer.created_at.desc(), Answer.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    return {
+        "items": [serialize_answer_with_question(row.Answer, row.Question, fields) for row in rows[:limit]],
+        "next_offset": offset + limit if has_more else None,
+    }
+
+
+# cursor 列是该行的 (created_at, id) 游标，断点续传时把收到的最后一行的 cursor 传回即可
+EXPORT_COLUMNS = ["id", "question_id", "question_text", "content", "created_at", "cursor"]
+
+
+def stream_answer_export(
+    user_email: str,
+    export_format: str,
+    since: Optional[datetime],
+    after: Optional[Tuple[datetime, str]],
+    compress: bool,
+):
+    """
+    按 (created_at, id) 顺序分批读取用户的全部答案，逐批编码为 NDJSON / CSV（可选 gzip）输出，
+    内存占用与答案数量无关
+    """
+    # 流式响应在接口返回后才被消费，使用独立的 session
+    db = SessionLocal()
+    gzip_stream = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(chunk: str) -> bytes:
+        data = chunk.encode()
+        return gzip_stream.compress(data) if gzip_stream else data
+
+    try:
+        query = (
+            db.query(Answer.id, Answer.question_id, Question.question_text, Answer.content, Answer.created_at)
+            .join(Question, Answer.question_id == Question.id)
+            .filter(Answer.user_email == user_email)
+            .order_by(Answer.created_at, Answer.id)
+        )
+        if since is not None:
+            query = query.filter(Answer.created_at > since)
+        if after is not None:
+            # 同一时间的多条答案按 id 区分，续传不会跳过与上一行时间相同的答案
+            created_at, answer_id = after
+            query = query.filter(
+                Answer.created_at >= created_at,
+                or_(Answer.created_at > created_at, Answer.id > answer_id),
+            )
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == "csv" else None
+        if writer:
+            # BOM 让 Excel 正确识别 UTF-8 中文
+            buffer.write("\ufeff")
+            writer.writerow(EXPORT_COLUMNS)
+        rows = 0
+        for row in query.yield_per(STREAM_BATCH_SIZE):
+            values = [
+                row.id, row.question_id, row.question_text, row.content, row.created_at.isoformat(),
+                encode_answer_cursor(row),
+            ]
+            if writer:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False) + "\n")
+            rows += 1
+            if rows % STREAM_BATCH_SIZE == 0:
+                chunk = encode(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if chunk:
+                    yield chunk
+        tail = encode(buffer.getvalue())
+        if gzip_stream:
+            tail += gzip_stream.flush()
+        if tail:
+            yield tail
     finally:
         db.close()
 
 
+@app.get("/api/user/export")
+def export_answers(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="导出格式: ndjson 或 csv"),
+    gzip: bool = Query(False, description="是否 gzip 压缩"),
+    since: Optional[str] = Query(None, description="只导出此时间（ISO 8601，不含）之后的答案"),
+    cursor: Optional[str] = Query(None, description="断点续传：已收到的最后一行的 cursor 列"),
+    user: User = Depends(get_current_user)
+):
+    """流式导出当前用户的全部答案（按时间顺序）"""
+    since_at = None
+    if since is not None:
+        since_at = parse_answer_created_at(since, "since").replace(tzinfo=None)
+    after = decode_answer_cursor(cursor) if cursor else None
+
+    filename = f"answers-{datetime.now(timezone.utc):%Y%m%d}.{format}" + (".gz" if gzip else "")
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_answer_export(user.email, format, since_at, after, gzip),
+        media_type="application/gzip" if gzip else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @app.get("/api/user/answers/by-date")
 def get_answers_by_date(
     date: str = Query(..., description="格式: YYYY-MM-DD"),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """获取用户某天的所有答案"""
-    db = SessionLocal()
     
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d")
     except ValueError:
-        db.close()
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
     start_time = target_date
@@ -696,8 +2954,6 @@ def get_answers_by_date(
         .all()
     )
     
-    db.close()
-    
     answer_list = [
         {
             "id": a.Answer.id,
@@ -717,23 +2973,34 @@ def get_answers_by_date(
 
 
 @app.get("/api/daily-questions")
-def get_daily_questions(db: Session = Depends(get_db)):
+def get_daily_questions(
+    fields: Optional[str] = Query(None, description="只返回这些字段，逗号分隔"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     返回每日推荐的3个问题
-    使用当天日期作为随机种子，确保同一天返回相同的问题
+    由当天日期的哈希决定选哪几个，确保同一天返回相同的问题
     """
-    all_questions = db.query(Question).all()
-    
-    if len(all_questions) < 3:
-        return [serialize_question(q) for q in all_questions]
-    
-    today = date.today() + timedelta(days=2)
-    seed = int(today.strftime("%Y%m%d"))
-    random.seed(seed)
-    
-    selected = random.sample(all_questions, 3)
-    
-    return [serialize_question(q) for q in selected]
+    fields = validate_fields(fields, QUESTION_FIELDS)
+    today = daily_question_day()
+    if QUESTION_CATALOG_CACHE:
+        catalog = question_catalog.current()
+        ids = get_daily_question_ids(db, today)
+        # 结果随日期和排期变化，ETag 同时包含目录版本、日期和所选问题
+        ids_digest = hashlib.sha256(",".join(ids).encode()).hexdigest()[:8]
+        etag = catalog.etag(f"-{today.isoformat()}-{ids_digest}")
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        by_id = catalog.by_id
+        selected = [pick_fields(by_id[qid], fields) for qid in ids if qid in by_id]
+        return catalog_response(selected, etag)
+
+    ids = get_daily_question_ids(db, today)
+    questions = {
+        q.id: q for q in db.query(Question).options(*question_load_only(fields)).filter(Question.id.in_(ids))
+    }
+    return [serialize_question(questions[qid], fields) for qid in ids if qid in questions]
 
 
 
@@ -751,14 +3018,14 @@ async def health_check():
 
 
 @app.get("/health/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+def readiness_check(db: Session = Depends(get_db)):
     """
     就绪检查 - 检查服务是否准备好接收流量
     包含数据库连接检查
     """
     try:
         # 测试数据库连接
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         
         return {
             "status": "ready",
@@ -792,7 +3059,7 @@ async def liveness_check():
 
 
 @app.get("/health/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)):
+def detailed_health_check(db: Session = Depends(get_db)):
     """
     详细健康检查 - 返回完整的系统状态
     包含数据库、环境等信息
@@ -808,7 +3075,7 @@ async def detailed_health_check(db: Session = Depends(get_db)):
     
     # 数据库检查
     try:
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         health_status["checks"]["database"] = {
             "status": "healthy",
             "message": "Database connection successful"
@@ -839,6 +3106,17 @@ async def detailed_health_check(db: Session = Depends(get_db)):
             "status": "warning",
             "error": str(e)
         }
+
+    # 缓存统计（用于调整缓存大小）
+    health_status["checks"]["token_cache"] = token_cache.stats()
+    health_status["checks"]["invalid_token_cache"] = invalid_token_cache.stats()
+    health_status["checks"]["rate_limits"] = {
+        "login": login_rate_limiter.stats(),
+        "auth_lookup": auth_lookup_rate_limiter.stats(),
+    }
+    health_status["checks"]["token_purge"] = dict(token_purge_stats)
+    health_status["checks"]["password_hashing"] = password_hash_pool.stats()
+    health_status["checks"]["drafts"] = draft_buffer.stats()
     
     # 根据检查结果返回适当的状态码
     status_code = 200 if health_status["status"] == "healthy" else 503
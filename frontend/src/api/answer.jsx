@@ -27,4 +27,43 @@ export async function getAnswers(token, questionId) {
     throw new Error("Failed to fetch answers");
   }
   return res.json();
-}
\ No newline at end of file
+}
+
+// 自动保存草稿（服务端先写入内存缓冲，几秒内批量落库）
+export async function saveDraft(token, questionId, content) {
+  const res = await fetch(apiUrl(`/api/drafts/${questionId}`), {
+    method: "PUT",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify({ content }),
+  });
+  if (!res.ok) {
+    throw new Error("Failed to save draft");
+  }
+  return res.json();
+}
+
+// 获取草稿，没有草稿时返回 null
+export async function getDraft(token, questionId) {
+  const res = await fetch(apiUrl(`/api/drafts/${questionId}`), {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (res.status === 404) return null;
+  if (!res.ok) {
+    throw new Error("Failed to fetch draft");
+  }
+  return res.json();
+}
+
+export async function deleteDraft(token, questionId) {
+  const res = await fetch(apiUrl(`/api/drafts/${questionId}`), {
+    method: "DELETE",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) {
+    throw new Error("Failed to delete draft");
+  }
+  return res.json();
+}
@@ -48,6 +48,17 @@ export async function getQuestion(questionId) {
 }
 
 
+// 按 id 批量获取问题，返回 { questions: { id: 问题 }, missing: [id] }
+export async function getQuestions(questionIds, fields) {
+  const res = await fetch(apiUrl("/api/questions/batch"), {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ids: questionIds, fields }),
+  });
+  if (!res.ok) throw new Error("获取问题失败");
+  return res.json();
+}
+
 
 // 获取每日推荐的3个问题
 export async function getDailyQuestions() {
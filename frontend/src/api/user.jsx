@@ -20,6 +20,19 @@ export async function getUserSettings(token) {
   return res.json();
 }
 
+// 分页获取当前用户的答案，cursor 为上一页返回的 next_cursor
+export async function getUserAnswers(token, { cursor, limit = 20 } = {}) {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  const res = await fetch(apiUrl(`/api/user/answers?${params}`), {
+    headers: {
+      "Authorization": `Bearer ${token}`,
+    },
+  });
+  if (!res.ok) throw new Error("获取答案失败");
+  return res.json();
+}
+
 export async function updateUserSettings(token, updates) {
   const res = await fetch(apiUrl("/api/user/settings"), {
     method: "PUT",
@@ -1,9 +1,9 @@
 // frontend/src/pages/QA/QApage.jsx
 
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import { getQuestion } from "../api/question";
-import { saveAnswer, getAnswers } from "../api/answer";
+import { saveAnswer, getAnswers, saveDraft, getDraft, deleteDraft } from "../api/answer";
 import { getCurrentUser } from "../api/user";
 
 export function useCurrentUser() {
@@ -42,6 +42,8 @@ export default function QuestionPage(props) {
   const [answers, setAnswers] = useState([]);
 
   const token = localStorage.getItem("token");
+  // 草稿加载完成前不自动保存，避免空内容覆盖已有草稿
+  const draftLoaded = useRef(false);
 
   useEffect(() => {
     async function fetchData() {
@@ -57,6 +59,30 @@ export default function QuestionPage(props) {
     }
   }, [token, questionId]);
 
+  // 恢复上次未提交的草稿
+  useEffect(() => {
+    draftLoaded.current = false;
+    if (!token) return;
+    getDraft(token, questionId)
+      .then(draft => {
+        if (draft) setAnswerContent(draft.content);
+      })
+      .catch(err => console.error("获取草稿失败", err))
+      .finally(() => { draftLoaded.current = true; });
+  }, [token, questionId]);
+
+  // 停止输入 1 秒后自动保存草稿，内容清空时删除草稿
+  useEffect(() => {
+    if (!token || !draftLoaded.current) return;
+    const timer = setTimeout(() => {
+      const request = answerContent
+        ? saveDraft(token, questionId, answerContent)
+        : deleteDraft(token, questionId);
+      request.catch(err => console.error("自动保存失败", err));
+    }, 1000);
+    return () => clearTimeout(timer);
+  }, [answerContent, token, questionId]);
+
   async function handleSubmit(e) {
     e.preventDefault();
     if (!token) {
@@ -69,6 +95,7 @@ export default function QuestionPage(props) {
     }
     try {
       await saveAnswer(answerContent, token, questionId);
+      // 服务端保存答案时已同时删除草稿，不依赖之后的自动保存
       setMessage("success");
       setAnswerContent("");
       fetchAnswers();
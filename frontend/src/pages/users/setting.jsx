@@ -1,10 +1,13 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import { getUserSettings, updateUserSettings, updateAnswer } from "../../api/user";
+import { getUserSettings, getUserAnswers, updateUserSettings, updateAnswer } from "../../api/user";
 
 export default function UserSettingsPage() {
   const token = localStorage.getItem("token");
   const [user, setUser] = useState(null);
+  const [answers, setAnswers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [form, setForm] = useState({ email: "", username: "", password: "" });
   const [message, setMessage] = useState("");
   const [isLoading, setIsLoading] = useState(true);
@@ -15,10 +18,12 @@ export default function UserSettingsPage() {
       setIsLoading(false);
       return;
     }
-    getUserSettings(token)
-      .then(data => {
+    Promise.all([getUserSettings(token), getUserAnswers(token)])
+      .then(([data, page]) => {
         setUser(data);
         setForm({ email: data.email, username: data.username, password: "" });
+        setAnswers(page.items);
+        setNextCursor(page.next_cursor);
       })
       .catch(e => setMessage("❌ " + e.message))
       .finally(() => setIsLoading(false));
@@ -38,14 +43,26 @@ export default function UserSettingsPage() {
     }
   };
 
+  const handleLoadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      const page = await getUserAnswers(token, { cursor: nextCursor });
+      setAnswers(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setMessage("❌ " + err.message);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleUpdateAnswer = async (answerId, newContent) => {
     setMessage("");
     try {
       await updateAnswer(token, answerId, newContent);
       setMessage("✅ 答案更新成功");
-      // 重新刷新用户信息
-      const data = await getUserSettings(token);
-      setUser(data);
+      // 只更新本地这一条，不再重新拉取全部答案
+      setAnswers(prev => prev.map(a => (a.id === answerId ? { ...a, content: newContent.trim() } : a)));
       setTimeout(() => setMessage(""), 3000);
     } catch (err) {
       setMessage("❌ " + err.message);
@@ -205,12 +222,12 @@ export default function UserSettingsPage() {
               <div>
                 <h2 className="text-2xl font-light text-gray-900">我的答案</h2>
                 <p className="text-gray-600 text-sm mt-1">
-                  共 {user?.answers?.length || 0} 个回答
+                  共 {user?.answer_count || 0} 个回答
                 </p>
               </div>
             </div>
 
-            {user?.answers?.length === 0 ? (
+            {answers.length === 0 ? (
               <div className="text-center py-16 bg-gradient-to-br from-teal-50 to-emerald-50 rounded-2xl">
                 <svg className="w-16 h-16 mx-auto mb-4 text-teal-300" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                   <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
@@ -220,13 +237,22 @@ export default function UserSettingsPage() {
               </div>
             ) : (
               <div className="space-y-6">
-                {user.answers.map(a => (
+                {answers.map(a => (
                   <AnswerItem
                     key={a.id}
                     answer={a}
                     onSave={newContent => handleUpdateAnswer(a.id, newContent)}
                   />
                 ))}
+                {nextCursor && (
+                  <button
+                    onClick={handleLoadMore}
+                    disabled={isLoadingMore}
+                    className="w-full py-3 text-emerald-700 bg-emerald-50 rounded-xl hover:bg-emerald-100 transition-colors disabled:opacity-50"
+                  >
+                    {isLoadingMore ? "加载中..." : "加载更多"}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -240,7 +266,7 @@ export default function UserSettingsPage() {
           </div>
           <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
             <div className="bg-white/10 backdrop-blur-sm rounded-2xl p-6 text-center">
-              <div className="text-4xl font-bold mb-2">{user?.answers?.length || 0}</div>
+              <div className="text-4xl font-bold mb-2">{user?.answer_count || 0}</div>
               <div className="text-emerald-50 text-sm">回答总数</div>
             </div>
             <div className="bg-white/10 backdrop-blur-sm rounded-2xl p-6 text-center">
@@ -0,0 +1,29 @@
+"""add tokens expires_at index
+
+Revision ID: a3c91f2d7b10
+Revises: 5e93ebdd4ec1
+Create Date: 2026-10-18 09:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c91f2d7b10'
+down_revision: Union[str, Sequence[str], None] = '5e93ebdd4ec1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 过期 token 清理任务按 expires_at 范围删除
+    op.create_index(op.f('ix_tokens_expires_at'), 'tokens', ['expires_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tokens_expires_at'), table_name='tokens', if_exists=True)
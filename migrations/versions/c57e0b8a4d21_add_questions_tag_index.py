@@ -0,0 +1,29 @@
+"""add questions tag index
+
+Revision ID: c57e0b8a4d21
+Revises: a3c91f2d7b10
+Create Date: 2026-10-18 10:05:12.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c57e0b8a4d21'
+down_revision: Union[str, Sequence[str], None] = 'a3c91f2d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # /api/questions?tag=... 按标签（及公开状态）筛选
+    op.create_index('ix_questions_tag_is_public', 'questions', ['tag', 'is_public'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_questions_tag_is_public', table_name='questions', if_exists=True)
@@ -0,0 +1,37 @@
+"""add answer and folder indexes
+
+Revision ID: e81f4a6c9d35
+Revises: c57e0b8a4d21
+Create Date: 2026-10-18 15:12:40.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f4a6c9d35'
+down_revision: Union[str, Sequence[str], None] = 'c57e0b8a4d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # /api/user/activity、/api/user/answers/by-date：某用户一段时间内的答案
+    op.create_index('ix_answers_user_email_created_at', 'answers', ['user_email', 'created_at'], unique=False, if_not_exists=True)
+    # /api/answer：某用户对某问题的答案
+    op.create_index('ix_answers_user_email_question_id_created_at', 'answers', ['user_email', 'question_id', 'created_at'], unique=False, if_not_exists=True)
+    # /api/folders：文件夹及其中的问题
+    op.create_index('ix_folders_user_id', 'folders', ['user_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_folder_questions_folder_id', 'folder_questions', ['folder_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_folder_questions_folder_id', table_name='folder_questions', if_exists=True)
+    op.drop_index('ix_folders_user_id', table_name='folders', if_exists=True)
+    op.drop_index('ix_answers_user_email_question_id_created_at', table_name='answers', if_exists=True)
+    op.drop_index('ix_answers_user_email_created_at', table_name='answers', if_exists=True)
@@ -0,0 +1,33 @@
+"""order questions tag index by id
+
+Revision ID: f4b2d8e1c607
+Revises: e81f4a6c9d35
+Create Date: 2026-10-18 19:40:27.316052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b2d8e1c607'
+down_revision: Union[str, Sequence[str], None] = 'e81f4a6c9d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # /api/questions?tag=... 按 id 分页：(tag, is_public) 索引筛选后还要排序，换成以 id 结尾的索引
+    op.create_index('ix_questions_tag_id', 'questions', ['tag', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_questions_tag_is_public_id', 'questions', ['tag', 'is_public', 'id'], unique=False, if_not_exists=True)
+    op.drop_index('ix_questions_tag_is_public', table_name='questions', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_questions_tag_is_public', 'questions', ['tag', 'is_public'], unique=False, if_not_exists=True)
+    op.drop_index('ix_questions_tag_is_public_id', table_name='questions', if_exists=True)
+    op.drop_index('ix_questions_tag_id', table_name='questions', if_exists=True)
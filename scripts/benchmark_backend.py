@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+后端性能基准测试脚本
+使用方法: python scripts/benchmark_backend.py <基准名称> [选项]
+
+默认使用临时 SQLite 数据库，不会影响开发数据；
+设置 BENCH_DATABASE_URL 可以指定其他数据库。
+"""
+
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# ✅ 添加 backend 目录到 Python 路径
+CURRENT_DIR = Path(__file__).resolve().parent
+BASE_DIR = CURRENT_DIR.parent
+BACKEND_DIR = BASE_DIR / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ✅ 必须在导入 main 之前设置环境变量
+BENCH_DIR = tempfile.mkdtemp(prefix="bench_")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{BENCH_DIR}/bench.db")
+os.environ.setdefault("TOKEN_SIGNING_KEYS", "bench:benchmark-secret,old:previous-secret")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, func, insert, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import main as api  # noqa: E402
+
+
+def measure(fn, iterations: int) -> float:
+    """执行 fn 若干次，返回每次平均耗时（微秒）"""
+    fn()  # 预热
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def print_row(name: str, micros: float, baseline: float = None):
+    ratio = f"  ({baseline / micros:.1f}x)" if baseline else ""
+    print(f"  {name:<60} {micros:>10.1f} µs/op{ratio}")
+
+
+def create_user(db, email: str = "bench@example.com"):
+    user = db.query(api.User).filter(api.User.email == email).first()
+    if user is None:
+        user = api.User(email=email, hashed_password=api.hash_password("bench"))
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    return user
+
+
+def bench_token_verify(args):
+    """未命中缓存时的 token 校验：签名 token vs tokens 表 token（都走完整的 authenticate_token）"""
+    db = api.SessionLocal()
+    user = create_user(db)
+    user_id, email = user.id, user.email
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    # 填充 tokens 表，模拟长期运行后的表大小
+    db.bulk_save_objects([
+        api.Token(token=api.generate_token(), email=email, expires_at=expires_at)
+        for _ in range(args.rows)
+    ])
+    table_token = api.generate_token()
+    db.add(api.Token(token=table_token, email=email, expires_at=expires_at))
+    db.commit()
+    db.close()
+
+    signed_token = api.create_signed_token(user_id, expires_at)
+
+    def cache_miss(token):
+        # 完整的 authenticate_token 未命中缓存路径：
+        # tokens 表 token 为 Token JOIN User 一条查询；签名 token 为 HMAC 校验 + 按主键查 User
+        def run():
+            api.token_cache.clear()
+            session = api.SessionLocal()
+            try:
+                assert api.authenticate_token(session, token).id == user_id
+            finally:
+                session.close()
+        return run
+
+    def signed_verify():
+        assert api.verify_signed_token(signed_token) is not None
+
+    print(f"Token 校验（tokens 表 {args.rows} 行，{args.iterations} 次，每次都未命中缓存）")
+    table_us = measure(cache_miss(table_token), args.iterations)
+    print_row("tokens 表 token (Token JOIN User)", table_us)
+    print_row("签名 token (HMAC + 按主键查 User)", measure(cache_miss(signed_token), args.iterations), table_us)
+    print_row("其中 HMAC 校验本身", measure(signed_verify, args.iterations), table_us)
+
+
+def seed_answers(rows: int, email: str = "bench@example.com"):
+    """批量插入答案数据"""
+    db = api.SessionLocal()
+    create_user(db, email)
+    question = api.Question(question_text="基准测试问题", tag="bench", inspiring_words="", is_public=True)
+    db.add(question)
+    db.commit()
+    now = datetime.now(timezone.utc)
+    db.bulk_save_objects([
+        api.Answer(
+            user_email=email,
+            content=f"第 {i} 条基准测试答案，" * 20,
+            created_at=now - timedelta(minutes=i),
+            question_id=question.id,
+        )
+        for i in range(rows)
+    ])
+    db.commit()
+    question_id = question.id
+    db.close()
+    return question_id
+
+
+def bench_concurrency(args):
+    """async def 中直接调用同步 Session vs 线程池中的 def 接口"""
+    seed_answers(args.rows)
+
+    def query_work():
+        # 一次需要扫描整张 answers 表的查询，模拟较慢的数据库访问
+        db = api.SessionLocal()
+        db.query(func.count(api.Answer.id)).filter(api.Answer.content.like("%不存在%")).scalar()
+        db.close()
+
+    probe_app = FastAPI()
+
+    @probe_app.get("/blocking")
+    async def blocking():
+        query_work()
+        return {}
+
+    @probe_app.get("/threadpool")
+    def threadpool():
+        query_work()
+        return {}
+
+    @probe_app.get("/ping")
+    async def ping():
+        return {}
+
+    async def run(path: str):
+        transport = httpx.ASGITransport(app=probe_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one():
+                async with semaphore:
+                    await client.get(path)
+
+            async def probe():
+                # 负载期间测量一个不访问数据库的接口的延迟（从计划发出时刻算起）
+                scheduled = time.perf_counter() + 0.05
+                await asyncio.sleep(0.05)
+                await client.get("/ping")
+                return (time.perf_counter() - scheduled) * 1000
+
+            started = time.perf_counter()
+            results = await asyncio.gather(probe(), *[one() for _ in range(args.requests)])
+            elapsed = time.perf_counter() - started
+            return args.requests / elapsed, results[0]
+
+    print(f"并发测试（answers 表 {args.rows} 行，{args.requests} 个请求，并发 {args.concurrency}）")
+    for name, path in [("async def + 同步 Session", "/blocking"), ("def（线程池）", "/threadpool")]:
+        throughput, ping_ms = asyncio.run(run(path))
+        print(f"  {name:<30} {throughput:>8.1f} req/s   负载中 /ping 延迟 {ping_ms:>8.1f} ms")
+
+
+def bench_answer_search(args):
+    """答案全文搜索：answers 表 rows 行，被搜索的用户有 --user-rows 条答案"""
+    # 200 个两字词，每条答案 3~7 个词，单个词约出现在 2.5% 的答案中
+    words = [chr(0x4e00 + i * 97 % 20000) + chr(0x4e00 + i * 89 % 20000 + 1) for i in range(200)]
+    email = "bench@example.com"
+    question_id = seed_answers(0, email)
+    db = api.SessionLocal()
+    now = datetime.now(timezone.utc)
+    for start in range(0, args.rows, 10000):
+        db.bulk_save_objects([
+            api.Answer(
+                user_email=email if i < args.user_rows else f"user{i % 1000}@example.com",
+                content="，".join(words[(i * 7 + k * 13) % len(words)] for k in range(i % 5 + 3)) + f" 第{i}条",
+                created_at=now - timedelta(minutes=i),
+                question_id=question_id,
+            )
+            for i in range(start, min(start + 10000, args.rows))
+        ])
+        db.commit()
+    user = db.query(api.User).filter(api.User.email == email).first()
+
+    started = time.perf_counter()
+    api.backfill_search_index(api.answer_search_index, api.Answer, ["content"], scope_column="user_email")
+    print(f"索引 {args.rows} 条答案耗时 {time.perf_counter() - started:.1f} s")
+
+    print(f"答案搜索（answers 表 {args.rows} 行，当前用户 {args.user_rows} 行，{args.iterations} 次）")
+    for query in [words[0], f"{words[1]} {words[2]}", "不存在的词"]:
+        def search():
+            api.search_user_answers(q=query, limit=20, offset=0, fields=None, user=user, db=db)
+        print_row(f"search_user_answers(q={query!r})", measure(search, args.iterations))
+    db.close()
+
+
+def bench_fields(args):
+    """fields= 稀疏字段集：响应字节数和延迟对比"""
+    email = "bench@example.com"
+    seed_answers(args.rows, email)
+    db = api.SessionLocal()
+    db.bulk_save_objects([
+        api.Question(
+            question_text=f"基准测试问题 {i}",
+            tag=f"tag{i % 20}",
+            inspiring_words="可以从小时候的经历、最近的一件小事或者一个人说起。" * 10,
+            is_public=True,
+        )
+        for i in range(args.rows)
+    ])
+    db.commit()
+    db.close()
+
+    # 关闭问题目录快照，对比的是 SQL 列清单下推的效果
+    api.QUESTION_CATALOG_CACHE = False
+    client = TestClient(api.app)
+    token = client.post("/api/auth/login", json={"email": email, "password": "bench"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    cases = [
+        ("/api/questions?limit=500", "question_text"),
+        ("/api/user/settings?include_answers=true", "id,question_text,created_at"),
+    ]
+    print(f"稀疏字段集（questions / answers 各 {args.rows} 行，{args.iterations} 次）")
+    for path, fields in cases:
+        baseline = None
+        for url in [path, f"{path}{'&' if '?' in path else '?'}fields={fields}"]:
+            size = len(client.get(url, headers=headers).content)
+            micros = measure(lambda: client.get(url, headers=headers), args.iterations)
+            print_row(f"{size / 1024:>8.1f} KB  {url}", micros, baseline)
+            baseline = baseline or micros
+
+
+def bench_answer_import(args):
+    """导入 --requests 条答案：逐条 POST /api/answer vs 一次 POST /api/answers/batch"""
+    email = "bench@example.com"
+    question_id = seed_answers(0, email)
+    client = TestClient(api.app)
+    token = client.post("/api/auth/login", json={"email": email, "password": "bench"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    answers = [{"question_id": question_id, "content": f"导入的第 {i} 条答案"} for i in range(args.requests)]
+
+    print(f"答案导入（{args.requests} 条）")
+    started = time.perf_counter()
+    for answer in answers:
+        assert client.post("/api/answer", json=answer, headers=headers).status_code == 200
+    single = time.perf_counter() - started
+    print(f"  {'逐条 POST /api/answer':<40} {single * 1000:>10.1f} ms   {args.requests / single:>10.1f} 条/s")
+
+    started = time.perf_counter()
+    for start in range(0, len(answers), api.ANSWER_BATCH_MAX_ITEMS):
+        chunk = answers[start:start + api.ANSWER_BATCH_MAX_ITEMS]
+        response = client.post("/api/answers/batch", json={"answers": chunk}, headers=headers)
+        assert response.json()["created"] == len(chunk)
+    batch = time.perf_counter() - started
+    print(f"  {'POST /api/answers/batch':<40} {batch * 1000:>10.1f} ms   {args.requests / batch:>10.1f} 条/s"
+          f"  ({single / batch:.1f}x)")
+
+
+class SQLiteCacheProbe:
+    """
+    直接通过 libsqlite3 打开数据库执行查询，用 sqlite3_db_status 读取页缓存命中/未命中次数
+    （Python 的 sqlite3 模块不暴露这两个计数）
+    """
+    SQLITE_ROW = 100
+    SQLITE_DBSTATUS_CACHE_HIT = 7
+    SQLITE_DBSTATUS_CACHE_MISS = 8
+
+    def __init__(self, path: str, cache_kb: int):
+        self.lib = ctypes.CDLL(ctypes.util.find_library("sqlite3"))
+        self.lib.sqlite3_open.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.c_void_p)]
+        self.lib.sqlite3_exec.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+        self.lib.sqlite3_prepare_v2.argtypes = [
+            ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.c_void_p), ctypes.c_void_p
+        ]
+        self.lib.sqlite3_bind_text.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p]
+        self.lib.sqlite3_db_status.argtypes = [
+            ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.c_int
+        ]
+        for name in ["sqlite3_step", "sqlite3_reset", "sqlite3_finalize", "sqlite3_close"]:
+            getattr(self.lib, name).argtypes = [ctypes.c_void_p]
+        self.lib.sqlite3_column_bytes.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.db = ctypes.c_void_p()
+        self.lib.sqlite3_open(path.encode(), ctypes.byref(self.db))
+        self.lib.sqlite3_exec(self.db, f"PRAGMA cache_size = -{cache_kb}".encode(), None, None, None)
+
+    def run(self, sql: str, params_list):
+        stmt = ctypes.c_void_p()
+        self.lib.sqlite3_prepare_v2(self.db, sql.encode(), -1, ctypes.byref(stmt), None)
+        for params in params_list:
+            for i, value in enumerate(params, start=1):
+                self.lib.sqlite3_bind_text(stmt, i, str(value).encode(), -1, ctypes.c_void_p(-1))
+            while self.lib.sqlite3_step(stmt) == self.SQLITE_ROW:
+                # 读取正文才会加载溢出页
+                self.lib.sqlite3_column_bytes(stmt, 0)
+            self.lib.sqlite3_reset(stmt)
+        self.lib.sqlite3_finalize(stmt)
+
+    def status(self, op: int, reset: bool = False) -> int:
+        current, highwater = ctypes.c_int(), ctypes.c_int()
+        self.lib.sqlite3_db_status(self.db, op, ctypes.byref(current), ctypes.byref(highwater), int(reset))
+        return current.value
+
+    def hit_rate(self, sql: str, params_list) -> float:
+        self.status(self.SQLITE_DBSTATUS_CACHE_HIT, reset=True)
+        self.status(self.SQLITE_DBSTATUS_CACHE_MISS, reset=True)
+        self.run(sql, params_list)
+        hits = self.status(self.SQLITE_DBSTATUS_CACHE_HIT)
+        misses = self.status(self.SQLITE_DBSTATUS_CACHE_MISS)
+        return hits / max(1, hits + misses)
+
+    def close(self):
+        self.lib.sqlite3_close(self.db)
+
+
+def bench_compression(args):
+    """答案正文压缩：磁盘占用、页缓存命中率、按用户+月份读取的延迟（明文 vs zlib）"""
+    rng = random.Random(42)
+    # 按近似 Zipf 分布从 3000 个常用汉字中取字造句，压缩率接近真实中文文本
+    chars = [chr(0x4e00 + i * 7) for i in range(3000)]
+    weights = [1 / (i + 1) for i in range(len(chars))]
+    sentences = [
+        "".join(rng.choices(chars, weights, k=rng.randint(8, 30))) + rng.choice("，。！？")
+        for _ in range(2000)
+    ]
+    users = [f"user{i}@example.com" for i in range(max(1, args.rows // 100))]
+    start_day = datetime(2025, 1, 1)
+
+    def make_rows(offset: int, count: int):
+        return [
+            {
+                "id": f"{offset + i:012d}",
+                "user_email": users[(offset + i) % len(users)],
+                "content": "".join(rng.choice(sentences) for _ in range(rng.randint(50, 200))),
+                "created_at": start_day + timedelta(minutes=rng.randrange(365 * 24 * 60)),
+                "question_id": "bench-question",
+            }
+            for i in range(count)
+        ]
+
+    databases = {}
+    for name, algorithm in [("明文", ""), ("zlib", "zlib")]:
+        path = os.path.join(BENCH_DIR, f"compression_{algorithm or 'plain'}.db")
+        engine = create_engine(f"sqlite:///{path}")
+        api.Base.metadata.create_all(engine)
+        databases[name] = (path, engine, algorithm)
+
+    print(f"生成 {args.rows} 条答案（{len(users)} 个用户，每条约 1k~4k 字）...")
+    for start in range(0, args.rows, 5000):
+        rows = make_rows(start, min(5000, args.rows - start))
+        for path, engine, algorithm in databases.values():
+            api.ANSWER_COMPRESSION = algorithm
+            with engine.begin() as conn:
+                conn.execute(insert(api.Answer), rows)
+
+    # 读取某用户某个月的答案（活跃度日历、按日期查看的访问路径）
+    queries = []
+    for _ in range(args.iterations):
+        month = rng.randint(1, 11)
+        queries.append((rng.choice(users), datetime(2025, month, 1), datetime(2025, month + 1, 1)))
+    raw_sql = "SELECT content FROM answers WHERE user_email = ? AND created_at >= ? AND created_at < ?"
+
+    print(f"页缓存 {args.cache_mb} MB，{args.iterations} 次按用户+月份读取")
+    print(f"  {'':<8} {'文件大小':>10} {'answers 表':>12} {'缓存命中率':>10} {'读取延迟':>14}")
+    for name, (path, engine, algorithm) in databases.items():
+        with engine.connect() as conn:
+            table_bytes = conn.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = 'answers'")).scalar()
+
+        probe = SQLiteCacheProbe(path, args.cache_mb * 1024)
+        params = [(email, str(start), str(end)) for email, start, end in queries]
+        probe.run(raw_sql, params)  # 预热
+        hit_rate = probe.hit_rate(raw_sql, params)
+        probe.close()
+
+        session = sessionmaker(bind=engine)()
+        session.execute(text(f"PRAGMA cache_size = -{args.cache_mb * 1024}"))
+        started = time.perf_counter()
+        for email, start, end in queries:
+            session.query(api.Answer.content).filter(
+                api.Answer.user_email == email, api.Answer.created_at >= start, api.Answer.created_at < end
+            ).all()
+        latency_ms = (time.perf_counter() - started) / len(queries) * 1000
+        session.close()
+
+        print(f"  {name:<8} {os.path.getsize(path) / 1024 / 1024:>8.1f} MB {table_bytes / 1024 / 1024:>9.1f} MB"
+              f" {hit_rate:>10.1%} {latency_ms:>11.2f} ms")
+
+
+def bench_settings(args):
+    """设置页加载：旧版 /api/user/settings 带全部答案 vs 个人资料 + /api/user/answers 第一页"""
+    email = "bench@example.com"
+    seed_answers(args.rows, email)
+    client = TestClient(api.app)
+    token = client.post("/api/auth/login", json={"email": email, "password": "bench"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def legacy():
+        return [client.get("/api/user/settings?include_answers=true", headers=headers)]
+
+    def split():
+        return [
+            client.get("/api/user/settings", headers=headers),
+            client.get("/api/user/answers?limit=20&truncate=200", headers=headers),
+        ]
+
+    print(f"设置页加载（当前用户 {args.rows} 条答案，{args.iterations} 次）")
+    baseline = None
+    for name, load in [("旧版：settings 带全部答案", legacy), ("资料 + 第一页答案", split)]:
+        size = sum(len(response.content) for response in load())
+        micros = measure(load, args.iterations)
+        print_row(f"{size / 1024:>8.1f} KB  {name}", micros, baseline)
+        baseline = baseline or micros
+
+
+BENCHMARKS = {
+    "token-verify": bench_token_verify,
+    "concurrency": bench_concurrency,
+    "answer-search": bench_answer_search,
+    "fields": bench_fields,
+    "answer-import": bench_answer_import,
+    "compression": bench_compression,
+    "settings": bench_settings,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后端性能基准测试")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=2000, help="每项测试的执行次数")
+    parser.add_argument("--rows", type=int, default=10000, help="预先填充的数据行数")
+    parser.add_argument("--user-rows", type=int, default=5000, help="答案搜索测试中当前用户的答案数")
+    parser.add_argument("--requests", type=int, default=200, help="并发测试的请求总数 / 导入测试的答案数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发测试的并发数")
+    parser.add_argument("--cache-mb", type=int, default=8, help="压缩测试中 SQLite 页缓存大小（MB）")
+    args = parser.parse_args()
+
+    print(f"📂 数据库: {os.environ['DATABASE_URL']}")
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
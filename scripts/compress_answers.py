@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+答案正文压缩迁移工具（一次性，可重复执行）
+使用方法:
+    python scripts/compress_answers.py [--algorithm zlib] [--batch-size 1000] [--vacuum]
+    python scripts/compress_answers.py --decompress            # 还原为明文（关闭压缩前执行）
+
+按 id 分批读取 answers，超过 ANSWER_COMPRESSION_MIN_BYTES 的正文改写为压缩格式，每批一个事务。
+已是目标格式的行会跳过，中断后重新执行即可继续。
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+# ✅ 添加 backend 目录到 Python 路径
+CURRENT_DIR = Path(__file__).resolve().parent
+BASE_DIR = CURRENT_DIR.parent
+BACKEND_DIR = BASE_DIR / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ✅ 加载环境变量
+load_dotenv(BACKEND_DIR / ".env.development")
+
+# 如果使用相对路径的 SQLite，确保指向 backend 目录（必须在导入 main 之前设置）
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+if DATABASE_URL.startswith("sqlite:///./"):
+    db_filename = DATABASE_URL.replace("sqlite:///./", "")
+    os.environ["DATABASE_URL"] = f"sqlite:///{BACKEND_DIR / db_filename}"
+
+from sqlalchemy import text  # noqa: E402
+
+import main as api  # noqa: E402
+
+
+def rewrite(args):
+    column = api.CompressedString()
+    dialect = api.engine.dialect
+    select_batch = text("SELECT id, content FROM answers WHERE id > :after ORDER BY id LIMIT :limit")
+    update_row = text("UPDATE answers SET content = :content WHERE id = :id")
+
+    scanned = rewritten = bytes_before = bytes_after = 0
+    after = ""
+    started = time.perf_counter()
+    while True:
+        with api.engine.begin() as conn:
+            rows = conn.execute(select_batch, {"after": after, "limit": args.batch_size}).all()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                if row.content is None:
+                    continue
+                plain = column.process_result_value(row.content, dialect)
+                stored = plain if args.decompress else column.process_bind_param(plain, dialect)
+                if stored != row.content:
+                    updates.append({"id": row.id, "content": stored})
+                    bytes_before += len(row.content if isinstance(row.content, bytes) else row.content.encode())
+                    bytes_after += len(stored if isinstance(stored, bytes) else stored.encode())
+            if updates:
+                conn.execute(update_row, updates)
+        scanned += len(rows)
+        rewritten += len(updates)
+        after = rows[-1].id
+        print(f"  已处理 {scanned} 行，改写 {rewritten} 行", end="\r")
+
+    print()
+    print(f"✅ 共处理 {scanned} 行，改写 {rewritten} 行，耗时 {time.perf_counter() - started:.1f} 秒")
+    if rewritten:
+        print(f"   改写行的正文: {bytes_before / 1024 / 1024:.1f} MB → {bytes_after / 1024 / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩（或还原）answers.content")
+    parser.add_argument("--algorithm", choices=sorted(api.COMPRESSION_CODECS), default=api.ANSWER_COMPRESSION or "zlib")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每个事务处理的行数")
+    parser.add_argument("--decompress", action="store_true", help="把已压缩的行还原为明文")
+    parser.add_argument("--vacuum", action="store_true", help="完成后执行 VACUUM 回收空间（仅 SQLite）")
+    args = parser.parse_args()
+
+    if not args.decompress:
+        if api.ANSWER_COMPRESSION != args.algorithm:
+            print(f"⚠️ 服务端 ANSWER_COMPRESSION={api.ANSWER_COMPRESSION or '（未开启）'}，"
+                  f"新写入的答案不会按 {args.algorithm} 压缩")
+        api.ANSWER_COMPRESSION = args.algorithm
+    elif api.ANSWER_COMPRESSION:
+        print("⚠️ 服务端仍开启了 ANSWER_COMPRESSION，新写入的长答案还会被压缩")
+
+    print(f"📂 数据库: {api.engine.url}")
+    rewrite(args)
+
+    if args.vacuum and api.engine.dialect.name == "sqlite":
+        print("🧹 VACUUM ...")
+        with api.engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("✅ VACUUM 完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+每日问题排期管理工具
+使用方法:
+    python scripts/daily_schedule.py fill [--days 14]          # 提前生成未来排期
+    python scripts/daily_schedule.py show [--days 14]          # 查看未来排期
+    python scripts/daily_schedule.py pin 2025-10-01 id1 id2 id3  # 手动固定某天的问题
+    python scripts/daily_schedule.py unpin 2025-10-01           # 取消固定（下次访问时重新计算）
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+# ✅ 添加 backend 目录到 Python 路径
+CURRENT_DIR = Path(__file__).resolve().parent
+BASE_DIR = CURRENT_DIR.parent
+BACKEND_DIR = BASE_DIR / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ✅ 加载环境变量
+load_dotenv(BACKEND_DIR / ".env.development")
+
+# 如果使用相对路径的 SQLite，确保指向 backend 目录（必须在导入 main 之前设置）
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+if DATABASE_URL.startswith("sqlite:///./"):
+    db_filename = DATABASE_URL.replace("sqlite:///./", "")
+    os.environ["DATABASE_URL"] = f"sqlite:///{BACKEND_DIR / db_filename}"
+
+import main as api  # noqa: E402
+
+
+def parse_day(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("日期格式应为 YYYY-MM-DD")
+
+
+def cmd_fill(args):
+    added = api.fill_daily_schedule(args.days)
+    print(f"✅ 新增 {added} 天排期（从 {api.daily_question_day()} 起共 {args.days} 天）")
+
+
+def cmd_show(args):
+    start = api.daily_question_day()
+    db = api.SessionLocal()
+    try:
+        entries = {
+            entry.day: entry for entry in db.query(api.DailySchedule).filter(
+                api.DailySchedule.day >= start,
+                api.DailySchedule.day < start + timedelta(days=args.days)
+            )
+        }
+        for offset in range(args.days):
+            day = start + timedelta(days=offset)
+            entry = entries.get(day)
+            if entry is None:
+                print(f"{day}  （未排期）")
+                continue
+            flag = "📌" if entry.pinned else "  "
+            print(f"{day} {flag}")
+            for qid in entry.question_ids.split(","):
+                question = db.get(api.Question, qid)
+                text = question.question_text if question else "（问题不存在）"
+                print(f"    {qid}  {text}")
+    finally:
+        db.close()
+
+
+def cmd_pin(args):
+    db = api.SessionLocal()
+    try:
+        found = {q.id for q in db.query(api.Question.id).filter(api.Question.id.in_(args.question_ids))}
+        missing = [qid for qid in args.question_ids if qid not in found]
+        if missing:
+            print(f"❌ 问题不存在: {', '.join(missing)}")
+            sys.exit(1)
+
+        entry = db.get(api.DailySchedule, args.day)
+        if entry is None:
+            entry = api.DailySchedule(day=args.day)
+            db.add(entry)
+        entry.question_ids = ",".join(args.question_ids)
+        entry.pinned = True
+        db.commit()
+        print(f"📌 已固定 {args.day} 的问题（运行中的服务最多 {api.DAILY_SCHEDULE_REFRESH} 秒后生效）")
+    finally:
+        db.close()
+
+
+def cmd_unpin(args):
+    db = api.SessionLocal()
+    try:
+        deleted = db.query(api.DailySchedule).filter(api.DailySchedule.day == args.day).delete()
+        db.commit()
+        print(f"🗑️  已删除 {args.day} 的排期" if deleted else f"{args.day} 没有排期")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日问题排期管理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fill = subparsers.add_parser("fill", help="提前生成未来排期")
+    fill.add_argument("--days", type=int, default=api.DAILY_SCHEDULE_DAYS_AHEAD or 14)
+    fill.set_defaults(func=cmd_fill)
+
+    show = subparsers.add_parser("show", help="查看未来排期")
+    show.add_argument("--days", type=int, default=api.DAILY_SCHEDULE_DAYS_AHEAD or 14)
+    show.set_defaults(func=cmd_show)
+
+    pin = subparsers.add_parser("pin", help="手动固定某天的问题")
+    pin.add_argument("day", type=parse_day)
+    pin.add_argument("question_ids", nargs="+")
+    pin.set_defaults(func=cmd_pin)
+
+    unpin = subparsers.add_parser("unpin", help="删除某天的排期")
+    unpin.add_argument("day", type=parse_day)
+    unpin.set_defaults(func=cmd_unpin)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
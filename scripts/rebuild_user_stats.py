@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+写作统计重建/校验工具
+使用方法:
+    python scripts/rebuild_user_stats.py [--batch-size 100]     # 从 answers 重新计算并覆盖 user_stats / user_tag_stats
+    python scripts/rebuild_user_stats.py --verify               # 只比对，不写入；有差异时退出码为 1
+    python scripts/rebuild_user_stats.py --user a@example.com   # 只处理指定用户
+
+统计由写入答案的接口增量维护，上线前已有的答案需要执行一次重建。
+按用户分批：每批用户的答案流式读取并累加，读完后在一个事务中覆盖这批用户的统计。
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+# ✅ 添加 backend 目录到 Python 路径
+CURRENT_DIR = Path(__file__).resolve().parent
+BASE_DIR = CURRENT_DIR.parent
+BACKEND_DIR = BASE_DIR / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ✅ 加载环境变量
+load_dotenv(BACKEND_DIR / ".env.development")
+
+# 如果使用相对路径的 SQLite，确保指向 backend 目录（必须在导入 main 之前设置）
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+if DATABASE_URL.startswith("sqlite:///./"):
+    db_filename = DATABASE_URL.replace("sqlite:///./", "")
+    os.environ["DATABASE_URL"] = f"sqlite:///{BACKEND_DIR / db_filename}"
+
+import main as api  # noqa: E402
+
+
+def next_users(db, after: str, limit: int):
+    rows = (
+        db.query(api.Answer.user_email)
+        .filter(api.Answer.user_email > after)
+        .distinct()
+        .order_by(api.Answer.user_email)
+        .limit(limit)
+        .all()
+    )
+    return [row.user_email for row in rows]
+
+
+def compute(db, emails):
+    """流式读取这些用户的答案，返回 {email: {tag: [答案数, 字符数, 字数]}}"""
+    stats = {email: {} for email in emails}
+    query = (
+        db.query(api.Answer.user_email, api.Answer.content, api.Question.tag)
+        .outerjoin(api.Question, api.Answer.question_id == api.Question.id)
+        .filter(api.Answer.user_email.in_(emails))
+        .yield_per(api.STREAM_BATCH_SIZE)
+    )
+    for row in query:
+        api.add_stats_delta(stats[row.user_email], row.tag, row.content)
+    return stats
+
+
+def stored(db, emails):
+    """数据库中现有的统计，格式同 compute"""
+    stats = {email: {} for email in emails}
+    for row in db.query(api.UserTagStats).filter(api.UserTagStats.user_email.in_(emails)):
+        if row.answer_count or row.char_count or row.word_count:
+            stats[row.user_email][row.tag] = [row.answer_count, row.char_count, row.word_count]
+    return stats
+
+
+def stored_totals(db, emails):
+    return {
+        row.user_email: [row.answer_count, row.char_count, row.word_count]
+        for row in db.query(api.UserStats).filter(api.UserStats.user_email.in_(emails))
+    }
+
+
+def compare(db, emails, computed):
+    """返回有差异的用户列表"""
+    existing = stored(db, emails)
+    totals = stored_totals(db, emails)
+    mismatched = []
+    for email in emails:
+        expected_totals = [sum(column) for column in zip(*computed[email].values())] or None
+        if existing[email] != computed[email] or totals.get(email) != expected_totals:
+            mismatched.append(email)
+            print(f"  ❌ {email}: 现有 {totals.get(email)} 按标签 {existing[email]}")
+            print(f"     {' ' * len(email)}  应为 {expected_totals} 按标签 {computed[email]}")
+    return mismatched
+
+
+def orphaned(db):
+    """有统计行但已没有答案的用户"""
+    has_answers = db.query(api.Answer.id).filter(api.Answer.user_email == api.UserStats.user_email).exists()
+    return [row.user_email for row in db.query(api.UserStats.user_email).filter(~has_answers)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重建或校验用户写作统计")
+    parser.add_argument("--batch-size", type=int, default=100, help="每个事务处理的用户数")
+    parser.add_argument("--verify", action="store_true", help="只比对，不写入")
+    parser.add_argument("--user", action="append", help="只处理指定用户（可重复）")
+    args = parser.parse_args()
+
+    print(f"📂 数据库: {api.engine.url}")
+    db = api.SessionLocal()
+    started = time.perf_counter()
+    processed = 0
+    mismatched = []
+    after = ""
+    # 指定了用户时不处理其他用户的残留统计
+    check_orphans = not args.user
+    try:
+        while True:
+            if check_orphans:
+                emails = next_users(db, after, args.batch_size)
+            else:
+                emails, args.user = args.user, []
+            if not emails:
+                break
+            computed = compute(db, emails)
+            if args.verify:
+                mismatched += compare(db, emails, computed)
+                db.rollback()
+            else:
+                for email in emails:
+                    api.replace_user_stats(db, email, computed[email])
+                db.commit()
+            processed += len(emails)
+            after = emails[-1]
+            print(f"  已处理 {processed} 个用户", end="\r")
+
+        print()
+        if args.verify:
+            stale = orphaned(db) if check_orphans else []
+            for email in stale:
+                print(f"  ❌ {email}: 没有答案但存在统计行")
+            mismatched += stale
+            print(f"{'✅' if not mismatched else '❌'} 校验 {processed} 个用户，{len(mismatched)} 个不一致")
+            sys.exit(1 if mismatched else 0)
+
+        stale = orphaned(db) if check_orphans else []
+        for email in stale:
+            api.replace_user_stats(db, email, {})
+        db.commit()
+        print(f"✅ 重建 {processed} 个用户的统计，清理 {len(stale)} 个，耗时 {time.perf_counter() - started:.1f} 秒")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
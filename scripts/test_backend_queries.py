@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+后端数据库访问测试脚本（进程内运行，无需启动服务）
+使用方法: python scripts/test_backend_queries.py
+
+统计每个请求执行的 SQL 条数和连接池 checkout 次数，
+防止接口回退到"每个请求多个 session / 多次鉴权查询"的写法；
+并检查热点查询的 EXPLAIN QUERY PLAN 确实走了对应的索引。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# ✅ 添加 backend 目录到 Python 路径
+CURRENT_DIR = Path(__file__).resolve().parent
+BASE_DIR = CURRENT_DIR.parent
+BACKEND_DIR = BASE_DIR / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ✅ 使用临时数据库，必须在导入 main 之前设置
+TEST_DIR = tempfile.mkdtemp(prefix="query_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR}/test.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main as api  # noqa: E402
+
+TEST_EMAIL = "query_test@example.com"
+TEST_PASSWORD = "testpass123"
+
+client = TestClient(api.app)
+results = []
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+
+def print_test(name, passed, details=""):
+    """打印测试结果"""
+    results.append(passed)
+    status = f"{Colors.GREEN}✓ PASS{Colors.END}" if passed else f"{Colors.RED}✗ FAIL{Colors.END}"
+    print(f"{status} {name}")
+    if details:
+        print(f"  {Colors.BLUE}{details}{Colors.END}")
+
+
+def print_section(title):
+    """打印测试部分标题"""
+    print(f"\n{Colors.YELLOW}{'='*60}{Colors.END}")
+    print(f"{Colors.YELLOW}{title}{Colors.END}")
+    print(f"{Colors.YELLOW}{'='*60}{Colors.END}")
+
+
+class QueryCounter:
+    """记录 SQL 语句和连接 checkout 次数"""
+
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+        self.checkouts = 0
+
+    @property
+    def queries(self):
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+        counter.parameters.append(parameters)
+
+    def on_checkout(dbapi_conn, conn_record, conn_proxy):
+        counter.checkouts += 1
+
+    event.listen(api.engine, "before_cursor_execute", on_execute)
+    event.listen(api.engine.pool, "checkout", on_checkout)
+    try:
+        yield counter
+    finally:
+        event.remove(api.engine, "before_cursor_execute", on_execute)
+        event.remove(api.engine.pool, "checkout", on_checkout)
+
+
+def setup_data():
+    """注册用户、登录并准备一个问题"""
+    client.post("/api/auth/signup", json={"email": TEST_EMAIL, "password": TEST_PASSWORD})
+    token = client.post(
+        "/api/auth/login", json={"email": TEST_EMAIL, "password": TEST_PASSWORD}
+    ).json()["access_token"]
+
+    db = api.SessionLocal()
+    question = api.Question(question_text="测试问题", tag="测试", inspiring_words="提示", is_public=True)
+    db.add(question)
+    db.commit()
+    question_id = question.id
+    db.close()
+    return {"Authorization": f"Bearer {token}"}, question_id
+
+
+def test_auth_query_count(headers, question_id):
+    """测试 1: 鉴权只用一条 JOIN 查询，且与接口共用一个连接"""
+    print_section("测试 1: 鉴权查询次数")
+
+    api.token_cache.clear()
+    with count_queries() as counter:
+        response = client.get("/api/answer", params={"question_id": question_id}, headers=headers)
+    print_test("GET /api/answer 成功", response.status_code == 200, f"状态码: {response.status_code}")
+    print_test("缓存未命中: 2 条 SQL（鉴权 + 查询答案）", counter.queries == 2, f"SQL 条数: {counter.queries}")
+    print_test("缓存未命中: 1 次连接 checkout", counter.checkouts == 1, f"checkout 次数: {counter.checkouts}")
+
+    with count_queries() as counter:
+        client.get("/api/answer", params={"question_id": question_id}, headers=headers)
+    print_test("缓存命中: 1 条 SQL", counter.queries == 1, f"SQL 条数: {counter.queries}")
+
+    api.token_cache.clear()
+    with count_queries() as counter:
+        response = client.post(
+            "/api/answer", json={"question_id": question_id, "content": "测试答案"}, headers=headers
+        )
+    print_test("POST /api/answer 成功", response.status_code == 200, f"状态码: {response.status_code}")
+    print_test("POST /api/answer: 1 次连接 checkout", counter.checkouts == 1, f"checkout 次数: {counter.checkouts}")
+
+
+def test_me_without_db(headers):
+    """测试 2: 缓存命中时 /api/me 不访问数据库"""
+    print_section("测试 2: /api/me 缓存命中")
+
+    client.get("/api/me", headers=headers)
+    with count_queries() as counter:
+        response = client.get("/api/me", headers=headers)
+    print_test("GET /api/me 成功", response.status_code == 200, f"状态码: {response.status_code}")
+    print_test("0 条 SQL", counter.queries == 0, f"SQL 条数: {counter.queries}")
+    print_test("0 次连接 checkout", counter.checkouts == 0, f"checkout 次数: {counter.checkouts}")
+
+
+def explain(statement, parameters):
+    """返回 SQLite 的 EXPLAIN QUERY PLAN 明细"""
+    with api.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+def check_plan(name, path, params, headers, table, index, sorted_by_index=False):
+    """
+    请求接口，取出访问 table 的 SELECT，检查其查询计划使用了 index 且没有全表扫描
+    sorted_by_index: 同时检查 ORDER BY 直接按索引顺序读取，没有临时 B 树排序
+    """
+    with count_queries() as counter:
+        response = client.get(path, params=params, headers=headers)
+    statements = [
+        (statement, parameters)
+        for statement, parameters in zip(counter.statements, counter.parameters)
+        if statement.lstrip().upper().startswith("SELECT") and f"FROM {table}" in statement
+    ]
+    if response.status_code != 200 or not statements:
+        print_test(name, False, f"状态码: {response.status_code}, 未找到 {table} 查询")
+        return
+    plan = explain(*statements[0])
+    uses_index = any(index in line for line in plan)
+    full_scan = any(line.startswith(f"SCAN {table}") for line in plan)
+    temp_sort = sorted_by_index and any("TEMP B-TREE FOR ORDER BY" in line for line in plan)
+    print_test(name, uses_index and not full_scan and not temp_sort, " | ".join(plan))
+
+
+def test_query_plans(headers, question_id):
+    """测试 3: 答案、问题、文件夹的热点查询走复合索引"""
+    print_section("测试 3: 查询计划")
+
+    folder_id = client.post("/api/folders", json={"name": "测试文件夹"}, headers=headers).json()["id"]
+    client.post(f"/api/folders/{folder_id}/questions", params={"question_id": question_id}, headers=headers)
+    today = api.datetime.now(api.timezone.utc)
+
+    check_plan(
+        "GET /api/answer → ix_answers_user_email_question_id_created_at",
+        "/api/answer", {"question_id": question_id}, headers,
+        "answers", "ix_answers_user_email_question_id_created_at",
+    )
+    check_plan(
+        "GET /api/user/activity → ix_answers_user_email_created_at",
+        "/api/user/activity", {"year": today.year, "month": today.month}, headers,
+        "answers", "ix_answers_user_email_created_at",
+    )
+    check_plan(
+        "GET /api/user/answers/by-date → ix_answers_user_email_created_at",
+        "/api/user/answers/by-date", {"date": today.strftime("%Y-%m-%d")}, headers,
+        "answers", "ix_answers_user_email_created_at",
+    )
+    check_plan(
+        "GET /api/user/answers → ix_answers_user_email_created_at",
+        "/api/user/answers", None, headers,
+        "answers", "ix_answers_user_email_created_at",
+    )
+    check_plan(
+        "GET /api/user/export → ix_answers_user_email_created_at",
+        "/api/user/export", {"since": "2000-01-01T00:00:00Z"}, headers,
+        "answers", "ix_answers_user_email_created_at",
+    )
+    check_plan(
+        "GET /api/questions?tag= → ix_questions_tag_id",
+        "/api/questions", {"tag": "测试"}, None,
+        "questions", "ix_questions_tag_id", sorted_by_index=True,
+    )
+    check_plan(
+        "GET /api/questions?tag=&is_public= → ix_questions_tag_is_public_id",
+        "/api/questions", {"tag": "测试", "is_public": "true"}, None,
+        "questions", "ix_questions_tag_is_public_id", sorted_by_index=True,
+    )
+    check_plan(
+        "GET /api/folders → ix_folders_user_id",
+        "/api/folders", None, headers,
+        "folders", "ix_folders_user_id",
+    )
+    check_plan(
+        "GET /api/folders → ix_folder_questions_folder_id",
+        "/api/folders", None, headers,
+        "folder_questions", "ix_folder_questions_folder_id",
+    )
+
+
+def test_activity_aggregate(headers, question_id):
+    """测试 4: 活跃度日历在数据库中按天聚合，结果与逐条计数一致，且不读取答案内容"""
+    print_section("测试 4: 活跃度日历聚合")
+
+    # 跨越月初/月末边界的答案，每天若干条
+    start = api.datetime(2024, 2, 1)
+    created = [start + api.timedelta(days=day, hours=hour) for day in range(-1, 30) for hour in range(0, 24, 5 + day % 4)]
+    db = api.SessionLocal()
+    db.add_all([
+        api.Answer(user_email=TEST_EMAIL, question_id=question_id, content="活跃度测试答案" * 50, created_at=at)
+        for at in created
+    ])
+    db.commit()
+
+    # 旧实现：取出当月全部答案在 Python 中计数
+    answers = db.query(api.Answer).filter(
+        api.Answer.user_email == TEST_EMAIL,
+        api.Answer.created_at >= api.datetime(2024, 2, 1),
+        api.Answer.created_at < api.datetime(2024, 3, 1),
+    ).all()
+    expected = {}
+    for answer in answers:
+        day = answer.created_at.strftime("%Y-%m-%d")
+        expected[day] = expected.get(day, 0) + 1
+    db.close()
+
+    with count_queries() as counter:
+        response = client.get("/api/user/activity", params={"year": 2024, "month": 2}, headers=headers)
+    daily_counts = response.json().get("daily_counts") if response.status_code == 200 else None
+    print_test(
+        "daily_counts 与逐条计数一致", daily_counts == expected,
+        f"{len(expected)} 天 / {sum(expected.values())} 条答案",
+    )
+
+    statements = [
+        (statement, parameters)
+        for statement, parameters in zip(counter.statements, counter.parameters)
+        if "FROM answers" in statement
+    ]
+    print_test(
+        "1 条 GROUP BY 查询，不读取 content 列",
+        len(statements) == 1 and "GROUP BY" in statements[0][0] and "content" not in statements[0][0],
+        statements[0][0].replace("\n", " ") if statements else "未找到 answers 查询",
+    )
+    plan = explain(*statements[0]) if statements else []
+    print_test(
+        "只读覆盖索引，不回表",
+        any("COVERING INDEX ix_answers_user_email_created_at" in line for line in plan),
+        " | ".join(plan),
+    )
+
+
+def test_draft_flush_concurrency(headers, question_id):
+    """测试 5: 后台刷新草稿时保存答案（单条与批量），两边不互相等待数据库锁"""
+    print_section("测试 5: 草稿刷新与保存答案并发")
+    answer = {"question_id": question_id, "content": "并发保存的答案"}
+    check_draft_flush_concurrency(headers, question_id, "/api/answer", answer)
+    check_draft_flush_concurrency(headers, question_id, "/api/answers/batch", {"answers": [answer]})
+
+
+def check_draft_flush_concurrency(headers, question_id, path, body):
+    client.put(f"/api/drafts/{question_id}", json={"content": "写了一半的答案"}, headers=headers)
+    flush_started = threading.Event()
+    original_insert = api.dialect_insert
+
+    def slow_insert(table):
+        # 刷新线程已持有 _flush_lock，停顿一下让保存答案的请求在此期间进来
+        if threading.current_thread() is flusher:
+            flush_started.set()
+            time.sleep(0.5)
+        return original_insert(table)
+
+    errors_before = api.draft_buffer.errors
+    flusher = threading.Thread(target=lambda: api.draft_buffer.flush())
+    api.dialect_insert = slow_insert
+    try:
+        flusher.start()
+        flush_started.wait(5)
+        started = time.perf_counter()
+        response = client.post(path, json=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        flusher.join()
+    finally:
+        api.dialect_insert = original_insert
+
+    print_test(f"POST {path} 成功", response.status_code == 200, f"状态码: {response.status_code}")
+    print_test("保存答案没有等到数据库锁超时", elapsed < 2, f"耗时: {elapsed:.2f}s")
+    print_test(
+        "草稿刷新没有失败", api.draft_buffer.errors == errors_before,
+        f"errors: {errors_before} → {api.draft_buffer.errors}",
+    )
+    draft = client.get(f"/api/drafts/{question_id}", headers=headers)
+    print_test("已提交答案的草稿被删除", draft.status_code == 404, f"状态码: {draft.status_code}")
+
+
+def test_search_rowid_collision(headers, question_id):
+    """测试 6: 全文索引的哈希 rowid 冲突时探测新位置，不覆盖其他答案的索引行"""
+    print_section("测试 6: 全文索引 rowid 冲突")
+
+    db = api.SessionLocal()
+    indexed_before = api.answer_search_index.count(db)
+    db.close()
+    original_rowid = api.search_rowid
+    # 让所有答案的首选 rowid 相同，模拟大量答案时的哈希冲突
+    api.search_rowid = lambda key, scope=None: original_rowid("collision", scope)
+    try:
+        client.post("/api/answer", json={"question_id": question_id, "content": "香蕉"}, headers=headers)
+        batch = client.post("/api/answers/batch", json={"answers": [
+            {"question_id": question_id, "content": "苹果"},
+            {"question_id": question_id, "content": "葡萄"},
+            {"question_id": question_id, "content": "西瓜"},
+        ]}, headers=headers)
+        first_id = batch.json()["results"][0]["id"]
+        client.put(f"/api/answer/{first_id}", json={"content": "苹果汁"}, headers=headers)
+    finally:
+        api.search_rowid = original_rowid
+
+    for word in ["苹果汁", "香蕉", "葡萄", "西瓜"]:
+        response = client.get("/api/user/answers/search", params={"q": word}, headers=headers)
+        found = [item["content"] for item in response.json()["items"]]
+        print_test(f"冲突的答案都能搜到: {word}", found == [word], f"结果: {found}")
+
+    db = api.SessionLocal()
+    added = api.answer_search_index.count(db) - indexed_before
+    db.close()
+    # 索引行数与答案数保持一致，启动时的补建检查才不会每次都重建
+    print_test("4 条答案各占一个索引行", added == 4, f"新增索引行: {added}")
+
+    low, high = api.search_scope_range(TEST_EMAIL)
+    print_test("探测到区间末尾后回到区间开头", api.search_next_rowid(high, TEST_EMAIL) == low)
+
+
+def main():
+    headers, question_id = setup_data()
+    test_auth_query_count(headers, question_id)
+    test_me_without_db(headers)
+    test_query_plans(headers, question_id)
+    test_activity_aggregate(headers, question_id)
+    test_draft_flush_concurrency(headers, question_id)
+    test_search_rowid_collision(headers, question_id)
+
+    passed = sum(results)
+    print(f"\n通过 {passed}/{len(results)}")
+    sys.exit(0 if passed == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()